@@ -0,0 +1,98 @@
+"""
+Compara ida y vuelta de jugadores con 10 temporadas: la serialización
+anterior (getattr sobre _serializable_attr y lstrip de cada clave) contra
+el códec compilado en formato diccionario, tupla y binario. También mide
+el diccionario de una entidad plana (árbitros), que es la ida y vuelta
+que hacen los repositorios genéricos con serialize/deserialize.
+
+En los jugadores la réplica anterior ya usa el armado de estadísticas de
+Season (el dict de cada temporada), que es la mayor parte del costo del
+formato diccionario; por eso ahí la diferencia es menor.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.codec_benchmark --players 2000
+"""
+import argparse
+import random
+import timeit
+
+import database  # noqa: F401 (models y database se importan entre sí; database va primero)
+from models import Player, Position, Referee, Season
+from models.player import STAT_FIELDS
+
+def make_players(count: int):
+    rng = random.Random(42)
+    players = []
+    for i in range(count):
+        seasons = [
+            Season(id=f"P{i}_{2010 + y}", year=2010 + y, team=f"Equipo {rng.randint(1, 20)}",
+                   stats={name: rng.randint(0, 3000) for name in STAT_FIELDS})
+            for y in range(10)
+        ]
+        players.append(Player.from_storage(id=f"P{i}", name=f"Jugador {i}", age=rng.randint(18, 38),
+                                           password="12345678", position=rng.choice(list(Position)), seasons=seasons))
+    return players
+
+def legacy_serialize(player):
+    # Réplica del camino anterior, solo para comparar
+    data = {attr: getattr(player, attr) for attr in Player._serializable_attr}
+    seasons = []
+    for season in player.get_seasons():
+        season_data = {attr: getattr(season, attr) for attr in Season._serializable_attr}
+        season_data["_team"] = season._team if isinstance(season._team, str) else season._team.get_id()
+        seasons.append(season_data)
+    data["_seasons"] = seasons
+    data["_position"] = player.get_position().value if player.get_position() else None
+    return data
+
+def legacy_deserialize(data):
+    data = dict(data)
+    if data.get("_position"):
+        data["_position"] = Position(data["_position"])
+    data["_seasons"] = [Season.from_storage(**{k.lstrip("_"): v for k, v in s.items()}) for s in data["_seasons"]]
+    return Player.from_storage(**{k.lstrip("_"): v for k, v in data.items()})
+
+def legacy_flat_serialize(element):
+    return {attr: getattr(element, attr) for attr in type(element)._serializable_attr}
+
+def legacy_flat_deserialize(cls, data):
+    return cls.from_storage(**{k.lstrip("_"): v for k, v in data.items()})
+
+def report(title: str, count: int, unit: str, cases, repeat: int):
+    print(f"{title}, mejor de {repeat}\n")
+    print(f"{'formato':18s} {unit + '/s':>12s} {'aceleración':>12s}")
+    baseline = None
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=1, repeat=repeat))
+        baseline = baseline or seconds
+        print(f"{name:18s} {count / seconds:12.0f} {baseline / seconds:11.1f}x")
+
+def run(players: int, repeat: int):
+    sample = make_players(players)
+    codec = Player.codec()
+    assert codec.loads(codec.dumps(sample[0])).serialize() == legacy_serialize(sample[0])
+    assert codec.from_dict(codec.to_dict(sample[0])).serialize() == legacy_serialize(sample[0])
+    report(f"{players} jugadores x 10 temporadas", players, "jugadores", {
+        "anterior (dict)": lambda: [legacy_deserialize(legacy_serialize(p)) for p in sample],
+        "códec dict": lambda: [codec.from_dict(codec.to_dict(p)) for p in sample],
+        "códec tupla": lambda: [codec.from_tuple(codec.to_tuple(p)) for p in sample],
+        "códec binario": lambda: codec.loads_many(codec.dumps_many(sample)),
+    }, repeat)
+    size = len(codec.dumps_many(sample))
+    print(f"\nbinario: {size / players:.0f} bytes por jugador\n")
+
+    referees = [Referee.from_storage(id=f"R{i}", name=f"Árbitro {i}", age=40, password="12345678", license="FIFA")
+                for i in range(players * 10)]
+    flat = Referee.codec()
+    report(f"{len(referees)} árbitros", len(referees), "árbitros", {
+        "anterior (dict)": lambda: [legacy_flat_deserialize(Referee, legacy_flat_serialize(r)) for r in referees],
+        "códec dict": lambda: [flat.from_dict(flat.to_dict(r)) for r in referees],
+        "códec tupla": lambda: [flat.from_tuple(flat.to_tuple(r)) for r in referees],
+    }, repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.players, args.repeat)
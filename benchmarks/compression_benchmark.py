@@ -0,0 +1,45 @@
+"""
+Compara tamaño y velocidad de lectura/escritura de players.csv plano,
+gzip y lzma.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.compression_benchmark --players 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from database import PlayerRepository
+from services.data_service import DataService
+
+def run(players: int, repeat: int):
+    workdir = tempfile.mkdtemp(prefix="compression-bench-")
+    os.chdir(workdir)
+    rows = list(DataService(PlayerRepository(filename=os.path.join("data", "source.csv"))).generate_data(players))
+    print(f"{len(rows)} filas jugador-temporada ({players} jugadores) en {workdir}\n")
+    print(f"{'formato':8s} {'tamaño (KB)':>12s} {'ratio':>7s} {'escritura (filas/s)':>20s} {'lectura (filas/s)':>18s}")
+    plain_size = None
+    for compression in (None, "gzip", "lzma"):
+        write_s = read_s = float("inf")
+        for i in range(repeat):
+            filename = os.path.join("data", f"players-{compression or 'plain'}-{i}.csv")
+            repo = PlayerRepository(filename=filename, compression=compression)
+            start = time.perf_counter()
+            repo.bulk_write_rows(iter(rows))
+            write_s = min(write_s, time.perf_counter() - start)
+            start = time.perf_counter()
+            read = sum(1 for _ in repo._iter_rows())
+            read_s = min(read_s, time.perf_counter() - start)
+            assert read == len(rows)
+            size = os.path.getsize(repo.filename)
+        plain_size = plain_size or size
+        print(f"{compression or 'plain':8s} {size / 1024:12.1f} {plain_size / size:7.2f} "
+              f"{len(rows) / write_s:20.0f} {len(rows) / read_s:18.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.players, args.repeat)
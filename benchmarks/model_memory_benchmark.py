@@ -0,0 +1,65 @@
+"""
+Mide la memoria por temporada en objetos Season: el formato anterior
+(__dict__, lista de atributos por instancia y dict de estadísticas) contra
+el actual (__slots__ y array('d')).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.model_memory_benchmark --players 5000
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from database import PlayerRepository
+from database.player_repository import SEASON_ROW_SCHEMA
+from models import Season
+from models.player import STAT_FIELDS
+from services.data_service import DataService
+
+class DictSeason:
+    # Réplica de la representación anterior de Season, solo para comparar
+    def __init__(self, id, year, team=None, stats=None):
+        self._id = id
+        self._team = team
+        self._year = year
+        self._stats = stats
+        self._serializable_attr = ["_id", "_team", "_year", "_stats"]
+
+def _decode(row):
+    # Como al leer del CSV: cada valor es un objeto nuevo
+    return {name: SEASON_ROW_SCHEMA[name](row[name]) for name in STAT_FIELDS}
+
+def measure(season_cls, rows):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    seasons = [
+        season_cls(id=f"{row['player_id']}_{row['season_year']}", year=int(row["season_year"]),
+                   team=row["team_name"], stats=_decode(row))
+        for row in rows
+    ]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # El id, el nombre del equipo y la lista son iguales en ambos casos
+    return allocated / len(seasons)
+
+def run(players: int):
+    os.chdir(tempfile.mkdtemp(prefix="model-memory-bench-"))
+    rows = [
+        {column: str(value) for column, value in row.items()}
+        for row in DataService(PlayerRepository(filename=os.path.join("data", "source.csv"))).generate_data(players)
+    ]
+    print(f"{len(rows)} temporadas ({players} jugadores)\n")
+    print(f"{'formato':24s} {'bytes/temporada':>16s}")
+    baseline = measure(DictSeason, rows)
+    compact = measure(Season, rows)
+    print(f"{'dict + __dict__':24s} {baseline:16.0f}")
+    print(f"{'array + __slots__':24s} {compact:16.0f}")
+    print(f"\nahorro: {1 - compact / baseline:.0%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.players)
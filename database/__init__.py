@@ -1,4 +1,12 @@
 from .repository import Repository, RepositoryProvider
+from .change_events import ChangeEvent, ChangeEventBus, change_events
+from .identity_map import IdentityMap, identity_session, current_identity_map, resolve_reference, resolve_references
+from .async_repository import AsyncRepository, ExecutorAsyncRepository, AsyncPlayerRepository, as_async
 from .json_repository import JSONRepository
+from .jsonl_repository import JSONLRepository
 from .csv_repository import CSVRepository
-from .player_repository import PlayerRepository
\ No newline at end of file
+from .player_repository import PlayerRepository
+from .player_views import PlayerViews, PlayerView, SeasonView
+from .sharded_player_repository import ShardedPlayerRepository
+from .normalized_player_repository import NormalizedPlayerRepository
+from .sqlite_repository import SQLiteRepository, SQLitePlayerRepository
\ No newline at end of file
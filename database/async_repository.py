@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+from .repository import Repository
+import asyncio
+import functools
+
+class AsyncRepository(ABC):
+    """Contraparte asíncrona de Repository."""
+    @abstractmethod
+    async def afind(self, id):
+        pass
+
+    @abstractmethod
+    async def afind_all(self):
+        pass
+
+    @abstractmethod
+    async def asave(self, element):
+        pass
+
+    @abstractmethod
+    async def adelete(self, id):
+        pass
+
+    @abstractmethod
+    async def areplace(self, id, element):
+        pass
+
+    @abstractmethod
+    async def abulk_write_rows(self, row_iterable, chunk_size: int = 10000):
+        pass
+
+    async def afind_many(self, ids):
+        return [await self.afind(id) for id in ids]
+
+    async def asave_many(self, elements):
+        return [await self.asave(element) for element in elements]
+
+    async def areplace_many(self, elements):
+        for id, element in elements.items():
+            await self.areplace(id, element)
+
+    async def adelete_many(self, ids):
+        for id in ids:
+            await self.adelete(id)
+
+
+class ExecutorAsyncRepository(AsyncRepository):
+    """
+    Adaptador asíncrono para un repositorio bloqueante (CSV, JSON, ...).
+
+    Las llamadas se ejecutan en un pool de `max_workers` hilos y como mucho
+    `max_pending` esperan turno; el resto espera en el event loop sin
+    ocupar hilos.
+
+    Las lecturas concurrentes se agrupan: los afind que llegan en la misma
+    vuelta del event loop se resuelven con un solo find_many (una sola
+    lectura del archivo) y varias llamadas iguales en curso (afind_all,
+    consultas) comparten el mismo resultado. Una escritura corta la
+    agrupación, así que una lectura posterior nunca recibe datos previos a
+    ella. Los objetos devueltos a lecturas agrupadas son compartidos.
+    """
+    def __init__(self, repository: Repository, executor: ThreadPoolExecutor = None, max_workers: int = 4,
+                 max_pending: int = 64):
+        self.repository = repository
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-repo")
+        self._max_pending = max_pending
+        self._slots = None
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._batch: Dict = None
+        self._generation = 0
+        self.coalesced = 0
+
+    async def _run(self, fn, *args, **kwargs):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_pending)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def _read(self, name: str, *args, **kwargs):
+        key = (self._generation, name, args, tuple(sorted(kwargs.items())))
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._run(getattr(self.repository, name), *args, **kwargs))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _write(self, name: str, *args, **kwargs):
+        self._generation += 1
+        self._batch = None
+        try:
+            return await self._run(getattr(self.repository, name), *args, **kwargs)
+        finally:
+            self._generation += 1
+
+    async def afind(self, id):
+        loop = asyncio.get_running_loop()
+        if self._batch is None:
+            self._batch = {}
+            loop.call_soon(self._flush_batch, self._batch)
+        else:
+            self.coalesced += 1
+        future = self._batch.get(id)
+        if future is None:
+            future = self._batch[id] = loop.create_future()
+        return await asyncio.shield(future)
+
+    def _flush_batch(self, batch: Dict):
+        if self._batch is batch:
+            self._batch = None
+        asyncio.ensure_future(self._resolve_batch(batch))
+
+    async def _resolve_batch(self, batch: Dict):
+        ids = list(batch)
+        try:
+            found = await self._read("find_many", tuple(ids))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for id, element in zip(ids, found):
+            if not batch[id].done():
+                batch[id].set_result(element)
+
+    async def afind_all(self):
+        return await self._read("findAll")
+
+    async def afind_many(self, ids):
+        return await self._read("find_many", tuple(ids))
+
+    async def asave(self, element):
+        return await self._write("save", element)
+
+    async def adelete(self, id):
+        return await self._write("delete", id)
+
+    async def areplace(self, id, element):
+        return await self._write("replace", id, element)
+
+    async def asave_many(self, elements):
+        return await self._write("save_many", list(elements))
+
+    async def areplace_many(self, elements):
+        return await self._write("replace_many", dict(elements))
+
+    async def adelete_many(self, ids):
+        return await self._write("delete_many", list(ids))
+
+    async def abulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000):
+        return await self._write("bulk_write_rows", row_iterable, chunk_size)
+
+    async def aclose(self):
+        if hasattr(self.repository, "close"):
+            await self._run(self.repository.close)
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+
+class AsyncPlayerRepository(ExecutorAsyncRepository):
+    """Adaptador asíncrono con las consultas de PlayerRepository."""
+    async def afind_by(self, **filters) -> List:
+        return await self._read("find_by", **filters)
+
+    async def afind_by_team(self, team_id, season_year: int = None) -> List:
+        return await self._read("find_by_team", team_id, season_year)
+
+    async def afind_by_position(self, position, season_year: int = None) -> List:
+        return await self._read("find_by_position", position, season_year)
+
+
+def as_async(repository: Repository, **kwargs) -> ExecutorAsyncRepository:
+    """Envuelve un repositorio con el adaptador asíncrono que le corresponde."""
+    if hasattr(repository, "find_by_team"):
+        return AsyncPlayerRepository(repository, **kwargs)
+    return ExecutorAsyncRepository(repository, **kwargs)
@@ -0,0 +1,305 @@
+from typing import Callable, Dict, Iterable, List
+from contextlib import contextmanager
+from itertools import islice
+import functools
+import json
+import threading
+import time
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+
+class ChangeEvent:
+    """Un cambio aplicado por un repositorio: entidad, id, operación y fila nueva (None en bajas)."""
+    __slots__ = ("entity", "id", "operation", "row", "timestamp")
+
+    def __init__(self, entity: str, id, operation: str, row: Dict = None, timestamp: float = None):
+        self.entity = entity
+        self.id = id
+        self.operation = operation
+        self.row = row
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def to_dict(self) -> Dict:
+        return {"ts": self.timestamp, "entity": self.entity, "id": self.id, "op": self.operation, "row": self.row}
+
+    def __repr__(self):
+        return f"ChangeEvent({self.entity}, {self.id!r}, {self.operation})"
+
+
+class ChangeEventBus:
+    """
+    Bus de eventos en proceso para los cambios de los repositorios.
+
+    Los suscriptores se llaman en el hilo que hizo la escritura, después de
+    que terminó. Un suscriptor que falla no afecta la escritura ni a los
+    demás suscriptores (se cuenta en `errors`). Opcionalmente cada evento se
+    agrega como una línea JSON a un archivo de changelog.
+    """
+    def __init__(self, changelog: str = None):
+        self._subscribers: List = []
+        self._lock = threading.Lock()
+        self._changelog = None
+        self.published = 0
+        self.errors = 0
+        if changelog:
+            self.open_changelog(changelog)
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None], entity: str = None) -> Callable[[], None]:
+        """
+        Registra un suscriptor, opcionalmente solo para una entidad ("Player", ...).
+
+        Returns:
+        callable: Función que cancela la suscripción
+        """
+        subscription = (entity, callback)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not subscription]
+        return unsubscribe
+
+    def open_changelog(self, path: str):
+        with self._lock:
+            if self._changelog is not None:
+                self._changelog.close()
+            self._changelog = open(path, "a", encoding="utf-8")
+
+    def close_changelog(self):
+        with self._lock:
+            if self._changelog is not None:
+                self._changelog.close()
+                self._changelog = None
+
+    def active(self) -> bool:
+        return bool(self._subscribers) or self._changelog is not None
+
+    def publish(self, event: ChangeEvent):
+        self.published += 1
+        if self._changelog is not None:
+            line = json.dumps(event.to_dict(), ensure_ascii=False, default=str) + "\n"
+            with self._lock:
+                if self._changelog is not None:
+                    self._changelog.write(line)
+                    self._changelog.flush()
+        for entity, callback in self._subscribers:
+            if entity is not None and entity != event.entity:
+                continue
+            try:
+                callback(event)
+            except Exception:
+                self.errors += 1
+
+
+# Bus compartido por todos los repositorios (ver Repository.events)
+change_events = ChangeEventBus()
+
+_depth = threading.local()
+
+
+def _merge(previous, operation):
+    # Operación neta de dos cambios seguidos sobre el mismo id (None: ninguno)
+    if previous is None:
+        return operation
+    if operation == DELETE:
+        return None if previous == INSERT else DELETE
+    if previous == INSERT:
+        return INSERT
+    return UPDATE
+
+
+class _Recorder:
+    """Cambios anotados por una escritura en curso, uno por id."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changes: Dict = {}
+
+    def add(self, id, operation, row):
+        with self._lock:
+            previous = self._changes.pop(id, (None, None))[0]
+            operation = _merge(previous, operation)
+            if operation is not None:
+                self._changes[id] = (operation, row)
+
+    def operations(self) -> Dict:
+        """Operación neta de cada id anotado, sin armar las filas."""
+        with self._lock:
+            return {id: operation for id, (operation, _) in self._changes.items()}
+
+    def drain(self) -> List:
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        return [(id, operation, row() if callable(row) else row) for id, (operation, row) in changes.items()]
+
+
+def recording() -> bool:
+    """Si la escritura en curso en este hilo va a publicar sus cambios."""
+    return getattr(_depth, "recorder", None) is not None
+
+
+def record_change(id, operation: str, row=None):
+    """
+    Anota un cambio que la escritura en curso aplicó.
+
+    Los repositorios lo llaman dentro de su sección con lock, solo para
+    lo que efectivamente escribieron; la llamada más externa lo publica al
+    terminar. Varios cambios del mismo id en una llamada salen como uno
+    solo (por ejemplo baja + alta = UPDATE).
+
+    Args:
+    id: Id de la entidad
+    operation (str): INSERT, UPDATE o DELETE
+    row (dict | callable, optional): La entidad serializada, o una función
+        que la arma (solo se llama si se publica)
+    """
+    recorder = getattr(_depth, "recorder", None)
+    if recorder is not None:
+        recorder.add(id, operation, row)
+
+
+@contextmanager
+def captured_changes():
+    """
+    Junta aparte los cambios que anotan las escrituras del bloque, para que
+    un repositorio compuesto (varias tablas por entidad) los anote como
+    propios. Da None si no se están publicando cambios.
+    """
+    previous = getattr(_depth, "recorder", None)
+    captured = _depth.recorder = _Recorder() if previous is not None else None
+    try:
+        yield captured
+    finally:
+        _depth.recorder = previous
+
+
+def carry_changes(fn: Callable) -> Callable:
+    """
+    Envuelve fn para ejecutarla en otro hilo (un pool) anotando sus cambios
+    en la escritura en curso de este hilo.
+    """
+    recorder = getattr(_depth, "recorder", None)
+    if recorder is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        _depth.recorder = recorder
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _depth.recorder = None
+    return run
+
+
+def _argument(args, kwargs):
+    # Primer argumento, posicional o por nombre (element, player, ids, ...)
+    return args[0] if args else next(iter(kwargs.values()))
+
+
+def _changes(name: str, args, kwargs, result) -> Iterable:
+    # (id, operación, fila) de las altas de save y save_many, que ya dicen
+    # en su resultado qué se guardó
+    if name == "save":
+        if result:
+            element = _argument(args, kwargs)
+            yield element.get_id(), INSERT, element.serialize()
+    elif name == "save_many":
+        for element, applied in zip(_argument(args, kwargs), result or []):
+            if element is not None and applied:
+                yield element.get_id(), INSERT, element.serialize()
+
+
+def _publish(repository, changes):
+    entity = repository.cls.__name__
+    for id, operation, row in list(changes):
+        repository.events.publish(ChangeEvent(entity, id, operation, row))
+
+
+def _row_chunks(rows, size: int, id_field: str):
+    # Bloques de `size` filas que no separan las filas seguidas de un mismo
+    # id, así cada entidad sale completa en un solo evento
+    rows = iter(rows)
+    pending = []
+    while True:
+        chunk = pending + list(islice(rows, size - len(pending)))
+        if not chunk:
+            return
+        pending = []
+        last = chunk[-1].get(id_field)
+        for row in rows:
+            if row.get(id_field) != last:
+                pending = [row]
+                break
+            chunk.append(row)
+        yield chunk
+
+
+def _bulk_write_publishing(repository, name: str, method, args, kwargs) -> Dict:
+    # Escritura masiva en bloques: cada bloque se escribe (anotando sus
+    # cambios) y recién después se publican sus entidades, así en memoria
+    # hay como mucho un bloque de eventos
+    from .repository import bulk_write_report  # repository importa este módulo
+    chunk_size = args[1] if len(args) > 1 else kwargs.get("chunk_size", 10000)
+    if name == "bulk_write_frames":
+        # Los DataFrames ya son bloques
+        chunks = ([frame] for frame in (args[0] if args else kwargs["frames"]))
+    else:
+        chunks = _row_chunks(args[0] if args else kwargs["row_iterable"], chunk_size, repository._id_field)
+    start_time = time.time()
+    totals = {}
+    for chunk in chunks:
+        recorder = _depth.recorder = _Recorder()
+        try:
+            report = method(repository, chunk, chunk_size)
+        finally:
+            _depth.recorder = None
+        for key, value in report.items():
+            if key not in ("duration_s", "rows_per_s"):
+                totals[key] = totals.get(key, 0) + value
+        _publish(repository, recorder.drain())
+    report = bulk_write_report(totals.pop("rows_written", 0), totals.pop("bytes_written", 0), start_time)
+    report.update(totals)
+    return report
+
+
+def publishes(name: str, method):
+    """
+    Envuelve un método de escritura para publicar sus cambios en
+    `self.events`, una vez que la escritura terminó y solo si cambió algo.
+    Solo publica la llamada más externa de cada hilo, así que los métodos
+    que se llaman entre sí no duplican eventos.
+
+    save y save_many publican según su resultado. El resto publica lo que
+    la implementación anotó con record_change mientras escribía, sin
+    volver a leer el repositorio; las escrituras masivas (bulk_write_rows,
+    bulk_write_frames) se hacen por bloques para publicar cada uno.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        depth = getattr(_depth, "value", 0)
+        bus = self.events
+        publish = depth == 0 and bus is not None and bus.active()
+        recorder = None
+        if publish and name in ("save_many",) and args:
+            # Se recorren dos veces: al escribir y al publicar
+            args = (list(args[0]),) + tuple(args[1:])
+        _depth.value = depth + 1
+        try:
+            if publish and name in ("bulk_write_rows", "bulk_write_frames"):
+                return _bulk_write_publishing(self, name, method, args, kwargs)
+            if publish and name not in ("save", "save_many"):
+                recorder = _depth.recorder = _Recorder()
+            result = method(self, *args, **kwargs)
+        finally:
+            _depth.value = depth
+            if recorder is not None:
+                _depth.recorder = None
+        if publish:
+            _publish(self, recorder.drain() if recorder is not None else _changes(name, args, kwargs, result))
+        return result
+    wrapper._publishes = True
+    return wrapper
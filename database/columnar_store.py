@@ -0,0 +1,163 @@
+from typing import Dict, List, Optional
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+class ColumnarSeasonStore:
+    """
+    Almacén columnar de filas jugador-temporada para lecturas analíticas.
+
+    Cada columna numérica se guarda como un archivo .npy y cada columna de
+    texto se codifica por diccionario (códigos int32 en .npy + valores en
+    JSON). Las lecturas usan np.load(mmap_mode='r'), así que abrir el
+    almacén no parsea nada y varios procesos comparten la misma caché de
+    páginas del sistema operativo.
+
+    Cada escritura arma las columnas en un subdirectorio nuevo y al final
+    reemplaza meta.json de forma atómica para que apunte a él; los
+    arreglos que otros lectores ya tienen mapeados no se modifican. meta.json
+    guarda además la firma (mtime, tamaño) del CSV de origen para saber
+    cuándo hay que reconstruir.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.meta_file = os.path.join(directory, "meta.json")
+
+    @classmethod
+    def for_source(cls, source: str) -> "ColumnarSeasonStore":
+        """Almacén asociado a un CSV: data/players.csv -> data/players.columns/"""
+        return cls(f"{os.path.splitext(source)[0]}.columns")
+
+    def _path(self, column: str, suffix: str, meta: Dict = None) -> str:
+        # Los almacenes escritos antes de las versiones tienen los archivos en la raíz
+        version = meta.get("version") if meta else None
+        folder = os.path.join(self.directory, version) if version else self.directory
+        return os.path.join(folder, f"{column}{suffix}")
+
+    def _signature(self, source: str) -> Dict:
+        st = os.stat(source)
+        return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def exists(self) -> bool:
+        return self._read_meta() is not None
+
+    def is_fresh(self, source: str) -> bool:
+        meta = self._read_meta()
+        return meta is not None and os.path.exists(source) and meta.get("source") == self._signature(source)
+
+    def write(self, df: pd.DataFrame, source: str = None):
+        """
+        Guarda un DataFrame en formato columnar.
+
+        Args:
+        df (DataFrame): Filas jugador-temporada ya tipadas
+        source (str, optional): CSV de origen, para detectar cambios
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        previous = self._read_meta()
+        # Directorio temporal propio: nadie lo lee hasta que meta.json lo nombre
+        version = os.path.basename(tempfile.mkdtemp(prefix="v-", dir=self.directory))
+        meta = {"version": version}
+        columns = []
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                np.save(self._path(name, ".npy", meta), series.to_numpy())
+                columns.append({"name": name, "kind": "numeric"})
+            else:
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                np.save(self._path(name, ".codes.npy", meta), codes.astype(np.int32))
+                with open(self._path(name, ".dict.json", meta), "w", encoding="utf-8") as f:
+                    json.dump([v if isinstance(v, str) else str(v) for v in uniques], f, ensure_ascii=False)
+                columns.append({"name": name, "kind": "dict"})
+        meta.update({
+            "rows": len(df),
+            "columns": columns,
+            "source": self._signature(source) if source else None,
+        })
+        tmp = f"{self.meta_file}.{version}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_file)
+        if previous and previous.get("version"):
+            # Los mapeos abiertos de la versión anterior siguen siendo válidos
+            # aunque se borren sus archivos
+            shutil.rmtree(os.path.join(self.directory, previous["version"]), ignore_errors=True)
+
+    def column_names(self) -> List[str]:
+        meta = self._read_meta()
+        return [c["name"] for c in meta["columns"]] if meta else []
+
+    def snapshot(self, columns: List[str] = None):
+        """
+        Abre la versión actual del almacén.
+
+        Args:
+        columns (list, optional): Columnas a leer; por defecto todas
+
+        Returns:
+        tuple: (meta, arreglos mapeados en memoria, valores de las columnas de
+            texto), todo de la misma versión
+        """
+        while True:
+            meta = self._read_meta()
+            if meta is None:
+                raise FileNotFoundError(f"No existe un almacén columnar en {self.directory}")
+            try:
+                arrays, categories = {}, {}
+                for column in meta["columns"]:
+                    name = column["name"]
+                    if columns is not None and name not in columns:
+                        continue
+                    if column["kind"] == "numeric":
+                        arrays[name] = np.load(self._path(name, ".npy", meta), mmap_mode="r")
+                    else:
+                        arrays[name] = np.load(self._path(name, ".codes.npy", meta), mmap_mode="r")
+                        categories[name] = self._load_categories(name, meta)
+                return meta, arrays, categories
+            except FileNotFoundError:
+                # Otra escritura reemplazó la versión mientras se abría
+                if self._read_meta() == meta:
+                    raise
+
+    def arrays(self, columns: List[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Retorna las columnas como arreglos mapeados en memoria (solo lectura).
+
+        Las columnas codificadas se devuelven como sus códigos int32; usar
+        snapshot() para leerlas junto con sus valores.
+        """
+        return self.snapshot(columns)[1]
+
+    def _load_categories(self, column: str, meta: Dict) -> List[str]:
+        with open(self._path(column, ".dict.json", meta), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def categories(self, column: str) -> List[str]:
+        return self._load_categories(column, self._read_meta())
+
+    def to_dataframe(self, columns: List[str] = None) -> pd.DataFrame:
+        """
+        Construye un DataFrame sobre los arreglos mapeados.
+
+        Las columnas numéricas no se copian y las de texto quedan como
+        Categorical (códigos + diccionario) en lugar de objetos str.
+        """
+        _, arrays, categories = self.snapshot(columns)
+        data = {}
+        for name, array in arrays.items():
+            if name in categories:
+                data[name] = pd.Categorical.from_codes(array, categories=categories[name])
+            else:
+                data[name] = array
+        return pd.DataFrame(data, copy=False)
@@ -1,43 +1,448 @@
-from .repository import Repository, RepositoryProvider
+from .repository import Repository, RepositoryProvider, bulk_write_report
+from .row_cache import RowCache
+from .file_lock import FileLock, writes_file
+from .write_ahead_log import WriteAheadLog
+from .change_events import INSERT, UPDATE, DELETE, recording, record_change
+from .query import parse_filters, compile_predicate, project
+from .compressed_file import detect_compression, with_compression, open_data_file, fsync_path
 from models import Serializable
+from contextlib import closing
+from itertools import islice
 from typing import Dict, Iterable
 import csv
+import functools
 import os
 import threading
+import time
 
 class CSVRepository(Repository):
-    def __init__(self, cls: Serializable):
+    _id_field = "_id"
+    indexed_fields = ()
+    # Si las filas de un mismo id se mantienen contiguas en el archivo (las
+    # entidades que ocupan varias filas, como los jugadores por temporada)
+    _keep_grouped = False
+
+    def __init__(self, cls: Serializable, cached: bool = False, append_only: bool = False, compact_every: int = 1000,
+                 durable: bool = False, checkpoint_every: int = 1000, filename: str = None, compression: str = None):
+        if append_only and durable:
+            raise ValueError("Los modos append_only y durable no se pueden combinar")
         self.cls = cls
-        self._lock = threading.Lock()
+        self._lock = threading.RLock()
         folder = "data"
         os.makedirs(folder, exist_ok=True)
-        self.filename = os.path.join(folder, f"{cls.__name__.lower()}s.csv")
+        # Con compression ("gzip" o "lzma") el archivo lleva la extensión
+        # correspondiente; también se detecta si `filename` ya la trae
+        self.filename = with_compression(filename or os.path.join(folder, f"{cls.__name__.lower()}s.csv"), compression)
+        self.compression = detect_compression(self.filename)
         if not os.path.exists(self.filename):
-            with open(self.filename, "w", newline="", encoding="utf-8") as f:
+            with self._open(self.filename, "w") as f:
                 writer = csv.writer(f)
                 writer.writerow([])
+        # En modo append las altas se escriben al final del archivo y las
+        # bajas/reemplazos se registran como lápidas (id, filas previas) en
+        # un archivo aparte hasta que compact() las integra
+        self.tombstone_file = f"{self.filename}.tomb"
+        self._append_only = append_only
+        self._compact_every = compact_every
+        self._ids = None
+        self._last_id = None
+        self._tracking_ids = append_only or self._keep_grouped
+        self._row_count = None
+        self._tombstone_count = 0
+        # Firma de los archivos cuando _ids, _last_id y _row_count se
+        # pusieron al día; si otro proceso escribe cambia y se vuelven a leer
+        self._state_signature = None
+        # Lock de lectores/escritor entre procesos. En modo durable las
+        # escrituras públicas solo tocan memoria y la bitácora, así que el
+        # lock exclusivo lo toma únicamente el checkpoint
+        self._file_lock = FileLock(f"{self.filename}.lock")
+        self._lock_writes = not durable
+        # En modo durable cada escritura queda primero en una bitácora con
+        # fsync agrupado y se aplica en memoria; el CSV se reemplaza de forma
+        # atómica cada `checkpoint_every` operaciones. La bitácora se puede
+        # compartir entre instancias: `_wal_seen` es hasta dónde se leyó
+        self._wal = WriteAheadLog(f"{self.filename}.wal", guard=self._file_lock.shared) if durable else None
+        self._wal_seen = 0
+        self._checkpoint_every = checkpoint_every
+        self._pending_ops = 0
+        # En modo cacheado las filas se mantienen en memoria y solo se
+        # vuelven a leer si cambia el mtime o el tamaño del archivo
+        cached = cached or durable
+        self._cache = RowCache(self.filename, self._id_field, [self.tombstone_file], self.indexed_fields) if cached else None
         RepositoryProvider.register(cls.__name__.capitalize(), self)
-    
+
+    def _open(self, path, mode):
+        if "b" in mode:
+            return open_data_file(path, mode, self.compression)
+        return open_data_file(path, mode, self.compression, newline="", encoding="utf-8")
+
     def _load(self):
+        if self._cache is not None and self._cache.is_fresh():
+            if self._wal is None:
+                return list(self._cache.rows())
+            # El CSV no cambió, pero otra instancia pudo escribir en la bitácora
+            with self._file_lock.shared(), self._lock:
+                if self._cache.is_fresh():
+                    self._sync_wal()
+                    return list(self._cache.rows())
+        with self._file_lock.shared():
+            return self._read_rows()
+
+    def _read_rows(self):
+        signature = self._cache.signature() if self._cache is not None else None
+        files_signature = self._files_signature()
         data = []
-        with open(self.filename, "r", newline="", encoding="utf-8") as f:
+        with self._open(self.filename, "r") as f:
             reader = csv.DictReader(f)
             for row in reader:
                 data.append(row)
-        return data
+        self._row_count = len(data)
+        data = self._apply_tombstones(data)
+        if self._wal is not None:
+            data = self._replay_wal(data)
+        self._track_ids(data)
+        self._state_signature = files_signature
+        if self._cache is not None:
+            self._cache.store(data, signature)
+        return list(data)
+
+    def _files_signature(self):
+        # (mtime, tamaño) del archivo y de sus lápidas, como RowCache.signature
+        stats = []
+        for filename in (self.filename, self.tombstone_file):
+            try:
+                st = os.stat(filename)
+            except FileNotFoundError:
+                stats.append(None)
+                continue
+            stats.append((st.st_mtime_ns, st.st_size))
+        return tuple(stats)
+
+    def _track_ids(self, data):
+        # Ids vigentes (y el de la última fila) para saber sin releer el
+        # archivo si un id existe o si sus filas nuevas quedarían separadas
+        if self._tracking_ids:
+            self._ids = {row.get(self._id_field) for row in data}
+            self._last_id = data[-1].get(self._id_field) if data else None
+
+    def _grouped(self, data):
+        # Las filas de cada id juntas, en el orden en que aparece cada id
+        groups = {}
+        for row in data:
+            groups.setdefault(row.get(self._id_field), []).append(row)
+        return [row for rows in groups.values() for row in rows]
+
+    def _breaks_grouping(self, id):
+        # Una fila nueva de un id que ya está en el archivo solo queda
+        # contigua si sigue a la última fila de ese id
+        if id == self._last_id:
+            return False
+        broken = id in self._ids
+        self._ids.add(id)
+        self._last_id = id
+        return broken
+
+    def _refresh_file_state(self, track_ids: bool = False):
+        # Se llama con el lock exclusivo: si otro proceso agregó filas o
+        # lápidas desde la última lectura, _ids y _row_count se releen.
+        # Con track_ids se empiezan a seguir los ids aunque el modo no lo pida
+        if track_ids and not self._tracking_ids:
+            self._tracking_ids = True
+            self._row_count = None
+        if self._row_count is None or self._state_signature != self._files_signature():
+            with self._file_lock.shared():
+                self._read_rows()
+
+    def _mark_synced(self, before):
+        # Tras una escritura propia, el estado sigue al día solo si lo estaba
+        # antes de escribir (firma `before`)
+        if self._state_signature is not None and self._state_signature == before:
+            self._state_signature = self._files_signature()
 
     def _save(self, data):
-        if not data:
-            with open(self.filename, "w", newline="", encoding="utf-8") as f:
+        if self._keep_grouped:
+            data = self._grouped(data)
+        with self._file_lock.exclusive():
+            fieldnames = list(data[0].keys()) if data else []
+            # En modo durable se escribe a un temporal y se reemplaza el archivo
+            # completo, así una caída nunca deja el CSV a medio escribir
+            target = f"{self.filename}.tmp" if self._wal is not None else self.filename
+            with self._open(target, "w") as f:
+                if data:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                    writer.writeheader()
+                    writer.writerows(data)
+                else:
+                    writer = csv.writer(f)
+                    writer.writerow([])
+            if self._wal is not None:
+                fsync_path(target)
+                os.replace(target, self.filename)
+            self._row_count = len(data)
+            # El archivo reescrito ya refleja las lápidas pendientes
+            if os.path.exists(self.tombstone_file):
+                os.remove(self.tombstone_file)
+            self._tombstone_count = 0
+            self._track_ids(data)
+            self._state_signature = self._files_signature()
+            if self._cache is not None:
+                self._cache.store(self._as_csv_rows(data, fieldnames), self._cache.signature())
+
+    def _as_csv_rows(self, data, fieldnames):
+        # Deja las filas igual que las devolvería csv.DictReader al releer el archivo
+        return [{k: "" if row.get(k) is None else str(row.get(k)) for k in fieldnames} for row in data]
+
+    def _read_header(self):
+        with self._open(self.filename, "r") as f:
+            return next(csv.reader(f), [])
+
+    def _append_rows(self, rows):
+        with self._file_lock.exclusive():
+            rows = list(rows)
+            if not rows:
+                return
+            fieldnames = self._read_header()
+            if not fieldnames:
+                # Archivo sin cabecera: no hay filas previas que conservar
+                self._save(rows)
+                return
+            fresh = self._cache is not None and self._cache.is_fresh()
+            before = self._files_signature()
+            with self._open(self.filename, "a") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writerows(rows)
+            split = self._track_appended(len(rows), [row.get(self._id_field) for row in rows])
+            self._mark_synced(before)
+            if fresh:
+                self._cache.append(self._as_csv_rows(rows, fieldnames), self._cache.signature())
+            elif self._cache is not None:
+                self._cache.invalidate()
+            if split:
+                self._save(self._read_rows())
+
+    def _load_tombstones(self):
+        tombstones = {}
+        count = 0
+        if os.path.exists(self.tombstone_file):
+            with open(self.tombstone_file, "r", newline="", encoding="utf-8") as f:
+                for id, before in csv.reader(f):
+                    tombstones[id] = max(int(before), tombstones.get(id, 0))
+                    count += 1
+        self._tombstone_count = count
+        return tombstones
+
+    def _apply_tombstones(self, data):
+        # Una lápida oculta las filas de ese id escritas antes de ella
+        tombstones = self._load_tombstones()
+        if not tombstones:
+            return data
+        return [row for i, row in enumerate(data) if i >= tombstones.get(row.get(self._id_field), 0)]
+
+    def _write_tombstone(self, id):
+        self._write_tombstones([id])
+
+    def _write_tombstones(self, ids):
+        with self._file_lock.exclusive():
+            # La lápida guarda cuántas filas tiene el archivo: tienen que
+            # contarse también las que agregó otro proceso
+            self._refresh_file_state()
+            fresh = self._cache is not None and self._cache.is_fresh()
+            before = self._files_signature()
+            with open(self.tombstone_file, "a", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
-                writer.writerow([])
+                writer.writerows([id, self._row_count] for id in ids)
+            self._tombstone_count += len(ids)
+            self._mark_synced(before)
+            signature = self._cache.signature() if fresh else None
+            for id in ids:
+                if self._ids is not None:
+                    self._ids.discard(id)
+                if fresh:
+                    self._cache.discard(id, signature)
+            if self._cache is not None and not fresh:
+                self._cache.invalidate()
+            if self._tombstone_count >= self._compact_every:
+                self.compact()
+
+    def _replay_wal(self, data):
+        # Cada registro fija todas las filas de un id (put) o lo elimina (del),
+        # por lo que solo importa el último registro de cada id. Antes se
+        # escriben los registros encolados, que ya están aplicados en memoria
+        self._wal.flush()
+        lines, self._wal_seen = self._wal.scan()
+        final = {}
+        for record in self._wal.parse(lines):
+            final.pop(record["id"], None)
+            final[record["id"]] = record
+        if not final:
+            return data
+        data = [row for row in data if row.get(self._id_field) not in final]
+        for record in final.values():
+            if record["op"] == "put":
+                data.extend(record["rows"])
+        return data
+
+    def _sync_wal(self):
+        # Con el lock compartido y self._lock: aplica sobre la caché lo que
+        # se agregó a la bitácora desde la última lectura. Si todo es propio
+        # ya está aplicado; si hay registros de otra instancia se escribe lo
+        # propio pendiente y se aplica todo en el orden del archivo
+        lines, end = self._wal.scan(self._wal_seen)
+        if all(self._wal.is_own(line) for line in lines):
+            self._wal_seen = end
             return
-        
-        fieldnames = data[0].keys()
-        with open(self.filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        self._wal.flush()
+        lines, end = self._wal.scan(self._wal_seen)
+        signature = self._cache.signature()
+        for record in self._wal.parse(lines):
+            self._cache.discard(record["id"], signature)
+            if record["op"] == "put":
+                self._cache.append(record["rows"], signature)
+        self._wal_seen = end
+
+    def _durable_write(self, id, rows=None, mode="upsert"):
+        return self._durable_apply([(id, rows, mode)])[0]
+
+    def _durable_apply(self, operations):
+        """
+        Registra en la bitácora y aplica en memoria escrituras por id.
+
+        Args:
+        operations (list): Tuplas (id, filas, modo). Filas None elimina el
+            id; el modo es "insert" (solo si no existe), "update" (solo si
+            existe), "upsert" o "append" (agrega las filas a las que ya tiene)
+
+        Returns:
+        list[bool]: Si cada operación se aplicó
+        """
+        applied = []
+        ticket = None
+        # Siempre se toma el lock del archivo antes que self._lock
+        with self._file_lock.shared(), self._lock:
+            self._load()
+            signature = self._cache.signature()
+            header = self._read_header()
+            for id, rows, mode in operations:
+                exists = bool(self._cache.lookup(id))
+                if (mode == "insert" and exists) or (mode == "update" and not exists):
+                    applied.append(False)
+                    continue
+                if mode == "append":
+                    rows = list(self._cache.lookup(id)) + list(rows)
+                self._cache.discard(id, signature)
+                if rows is None:
+                    ticket = self._wal.append({"op": "del", "id": id})
+                    if exists:
+                        record_change(id, DELETE)
+                else:
+                    fieldnames = header or (list(rows[0].keys()) if rows else [])
+                    rows = self._as_csv_rows(rows, fieldnames)
+                    self._cache.append(rows, signature)
+                    ticket = self._wal.append({"op": "put", "id": id, "rows": rows})
+                    record_change(id, UPDATE if exists else INSERT, functools.partial(self._entity_row, rows))
+                self._pending_ops += 1
+                applied.append(True)
+            checkpoint = self._pending_ops >= self._checkpoint_every
+        # La espera del fsync ocurre fuera del lock para que las escrituras
+        # concurrentes se agrupen en el mismo commit
+        if ticket is not None:
+            self._wal.wait(ticket)
+        if checkpoint:
+            self.checkpoint()
+        return applied
+
+    def _entity_row(self, rows):
+        # La entidad serializada que forman las filas de un id, para los
+        # eventos de cambio
+        return self.cls.deserialize(dict(rows[0])).serialize()
+
+    def _record_written(self, rows):
+        # Anota un alta o modificación por id de las filas agregadas, según
+        # si el id ya existía (_ids tiene que estar al día y seguirse)
+        groups = {}
+        for row in rows:
+            groups.setdefault(row.get(self._id_field), []).append(row)
+        for id, id_rows in groups.items():
+            record_change(id, UPDATE if id in self._ids else INSERT, functools.partial(self._entity_row, id_rows))
+
+    def _durable_save_many(self, elements, to_rows):
+        # Los None no se registran, pero conservan su False en el resultado
+        present = [element for element in elements if element is not None]
+        applied = iter(self._durable_apply([(element.get_id(), to_rows(element), "insert") for element in present]))
+        return [False if element is None else next(applied) for element in elements]
+
+    def checkpoint(self):
+        """
+        Vuelca el estado en memoria al CSV y vacía la bitácora (modo durable).
+        """
+        if self._wal is None:
+            return
+        with self._file_lock.exclusive(), self._lock:
+            # Lo encolado y aún no escrito también tiene que quedar en el CSV
+            # antes de vaciar la bitácora, igual que lo que escribieron otras
+            # instancias (que _load aplica). Nadie puede agregar registros
+            # mientras se tiene el lock exclusivo
+            self._wal.flush()
+            rows = self._load()
+            self._save(rows)
+            self._wal.truncate()
+            self._wal_seen = 0
+            self._pending_ops = 0
+
+    def warm_up(self):
+        if self._cache is not None or (self._append_only and self._ids is None):
+            self._load()
+
+    def lock_stats(self):
+        """Adquisiciones y espera del lock del archivo, por modo."""
+        return self._file_lock.stats()
+
+    def wal_stats(self):
+        """Registros escritos, fsyncs y registros por fsync de la bitácora."""
+        return self._wal.stats() if self._wal is not None else None
+
+    def close(self):
+        if self._wal is not None:
+            self.checkpoint()
+            self._wal.close()
+
+    def compact(self):
+        """
+        Reescribe el archivo integrando las lápidas pendientes.
+
+        En modo append se ejecuta automáticamente cada `compact_every` lápidas.
+        """
+        with self._file_lock.exclusive(), self._lock:
+            self._save(self._load())
+
+    def _has_id(self, id):
+        if self._append_only and self._cache is None:
+            # Las escrituras llegan con el lock exclusivo tomado, así que lo
+            # que se lee aquí no cambia hasta que terminen
+            with self._file_lock.exclusive():
+                self._refresh_file_state()
+                return id in self._ids
+        return bool(self._find_rows(id))
+
+    def _find_rows(self, id):
+        if self._cache is not None:
+            self._load()
+            return list(self._cache.lookup(id))
+        return [row for row in self._load() if row.get(self._id_field) == id]
+
+    def _rows_by_id(self, ids):
+        # Una sola pasada (o búsquedas en la caché) para todo el lote
+        wanted = {id: [] for id in ids}
+        if self._cache is not None:
+            self._load()
+            for id in wanted:
+                wanted[id] = list(self._cache.lookup(id))
+            return wanted
+        for row in self._load():
+            rows = wanted.get(row.get(self._id_field))
+            if rows is not None:
+                rows.append(row)
+        return wanted
 
     def _read_all(self):
         try:
@@ -45,54 +450,428 @@ class CSVRepository(Repository):
         except (FileNotFoundError, csv.Error):
             return []
 
+    def _iter_rows(self):
+        for row, _ in self._iter_rows_from(None):
+            yield row
+
+    def _iter_rows_from(self, cursor, batch_size: int = 1000):
+        """
+        Itera las filas vigentes a partir de un cursor de page().
+
+        Junto a cada fila entrega el cursor que apunta a la siguiente. Con
+        caché (y en modo durable) las filas ya están en memoria y el cursor
+        es su posición en la lista; si no, el archivo se lee desde el offset
+        del cursor, sin recorrer lo anterior, en lotes de `batch_size` filas.
+        Cada lote se lee bajo el lock compartido y se entrega después de
+        soltarlo, así quien consume el iterador puede escribir en el
+        repositorio sin quedar esperando su propio lock.
+        """
+        if self._cache is not None:
+            rows = self._load()
+            for i in range(int(cursor or 0), len(rows)):
+                yield rows[i], str(i + 1)
+            return
+        # Un archivo comprimido solo se posiciona descomprimiendo desde el
+        # principio, así que entre lotes se conserva abierto el mismo
+        # descompresor; se vuelve a abrir solo si el archivo cambió
+        scan = {}
+        try:
+            while cursor != "":
+                batch, cursor = self._read_batch(cursor, batch_size, scan)
+                yield from batch
+        finally:
+            if scan.get("file") is not None:
+                scan["file"].close()
+
+    def _file_signature(self):
+        st = os.stat(self.filename)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _read_batch(self, cursor, limit, scan):
+        # Hasta `limit` filas vigentes desde el cursor, y el cursor siguiente
+        # ("" al llegar al final del archivo). El offset del cursor es la
+        # posición en el contenido descomprimido
+        offset, index = map(int, cursor.split(":")) if cursor else (0, 0)
+        batch = []
+        with self._file_lock.shared():
+            tombstones = self._load_tombstones()
+            signature = self._file_signature()
+            f = scan.pop("file", None)
+            if f is not None and scan.get("signature") != signature:
+                f.close()
+                f = None
+            try:
+                if f is None:
+                    f = self._open(self.filename, "rb")
+                    scan["fieldnames"] = next(csv.reader([f.readline().decode("utf-8")]), [])
+                    if offset:
+                        f.seek(offset)
+                    else:
+                        offset = f.tell()
+                fieldnames = scan["fieldnames"]
+                if not fieldnames:
+                    return batch, ""
+                position = [offset]
+
+                def lines():
+                    for line in iter(f.readline, b""):
+                        position[0] += len(line)
+                        yield line.decode("utf-8")
+
+                # csv.reader pide líneas de a una, así que al terminar cada
+                # registro `position` apunta al inicio del siguiente
+                for values in csv.reader(lines()):
+                    if not values:
+                        continue
+                    row = dict(zip(fieldnames, values))
+                    for field in fieldnames[len(values):]:
+                        row[field] = None
+                    live = index >= tombstones.get(row.get(self._id_field), 0)
+                    index += 1
+                    if live:
+                        batch.append((row, f"{position[0]}:{index}"))
+                        if len(batch) == limit:
+                            if self.compression is not None:
+                                scan["file"], scan["signature"] = f, signature
+                                f = None
+                            return batch, f"{position[0]}:{index}"
+                return batch, ""
+            finally:
+                if f is not None:
+                    f.close()
+
+    def page(self, cursor: str = None, limit: int = 50):
+        """
+        Retorna una página de elementos y el cursor de la siguiente.
+
+        Sin caché solo se lee la parte del archivo que ocupa la página. El
+        cursor sigue siendo válido si se agregan filas al final; si el
+        archivo se reescribe entre páginas se pueden repetir o saltar
+        elementos.
+
+        Args:
+        cursor (str, optional): Cursor devuelto por la página anterior
+        limit (int): Cantidad máxima de elementos
+
+        Returns:
+        tuple: (lista de elementos, cursor siguiente o None si no hay más)
+        """
+        items = []
+        next_cursor = None
+        with closing(self._iter_rows_from(cursor)) as rows:
+            for row, after in rows:
+                if len(items) == limit:
+                    return items, next_cursor
+                items.append(self.cls.deserialize(dict(row)))
+                next_cursor = after
+        return items, None
+
+    def _candidate_rows(self, conditions):
+        # Una igualdad sobre el id o sobre una columna indexada acota las
+        # filas a revisar usando la caché
+        if self._cache is not None:
+            self._load()
+            lookups = []
+            for column, op, value in conditions:
+                if op != "eq" or not isinstance(value, (str, int)) or isinstance(value, bool):
+                    continue
+                if column == self._id_field:
+                    lookups.append(self._cache.lookup(str(value)))
+                elif column in self.indexed_fields:
+                    lookups.append(self._cache.lookup_by(column, str(value)))
+            if lookups:
+                return list(min(lookups, key=len))
+        return self._iter_rows()
+
+    def _query_rows(self, filters):
+        conditions = parse_filters(filters)
+        predicate = compile_predicate(conditions)
+        return (row for row in self._candidate_rows(conditions) if predicate(row))
+
+    def query(self, columns=None, **filters):
+        rows = self._query_rows(filters)
+        if columns is not None:
+            return project(rows, columns)
+        return (self.cls.deserialize(dict(row)) for row in rows)
+
     def find(self, id):
-        data = self._load()
-        for element in data:
-            if element.get("_id") == id:
-                return self.cls.deserialize(element)
-        return None
-    
+        rows = self._find_rows(id)
+        if not rows:
+            return None
+        return self.cls.deserialize(dict(rows[0]))
+
     def findAll(self):
-        return [self.cls.deserialize(element) for element in self._load()]
+        return [self.cls.deserialize(dict(element)) for element in self._load()]
 
+    @writes_file
     def save(self, element):
         if element == None:
             return False
-        data = self._load()
         id = element.get_id()
         print(element.get_id())
-        for e in data:
-            if e.get("_id") == id:
-                return False
+        if self._wal is not None:
+            return self._durable_write(id, [element.serialize()], mode="insert")
+        if self._has_id(id):
+            return False
+        if self._append_only:
+            self._append_rows([element.serialize()])
+            return True
+        data = self._load()
         data.append(element.serialize())
         self._save(data)
         return True
 
+    @writes_file
     def delete(self, id):
+        if self._wal is not None:
+            self._durable_write(id)
+            return
+        if self._append_only:
+            if self._has_id(id):
+                self._write_tombstone(id)
+                record_change(id, DELETE)
+            return
         data = self._load()
         new_data = [d for d in data if d.get("_id") != id]
         self._save(new_data)
+        if len(new_data) != len(data):
+            record_change(id, DELETE)
 
+    @writes_file
     def replace(self, id, element):
+        if self._wal is not None:
+            self._durable_write(id, [element.serialize()], mode="update")
+            return
+        if self._append_only:
+            if self._has_id(id):
+                self._write_tombstone(id)
+                self._append_rows([element.serialize()])
+                record_change(id, UPDATE, element.serialize)
+            return
         data = self._load()
         for i, d in enumerate(data):
             if d.get("_id") == id:
                 data[i] = element.serialize()
+                record_change(id, UPDATE, element.serialize)
                 break
         self._save(data)
 
-    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> None:
-        with self._lock:
-            existing = self._read_all()
-            buf = []
-            count = 0
-            for row in row_iterable:
-                buf.append(row)
-                count += 1
-                if len(buf) >= chunk_size:
-                    existing.extend(buf)
-                    self._save(existing)
-                    buf = []
-            if buf:
-                existing.extend(buf)
-                self._save(existing)
\ No newline at end of file
+    def find_many(self, ids):
+        ids = list(ids)
+        found = self._rows_by_id(ids)
+        return [self.cls.deserialize(dict(found[id][0])) if found[id] else None for id in ids]
+
+    @writes_file
+    def save_many(self, elements):
+        elements = list(elements)
+        if self._wal is not None:
+            return self._durable_save_many(elements, lambda element: [element.serialize()])
+        data = self._load()
+        known = {row.get(self._id_field) for row in data}
+        result = []
+        new_rows = []
+        for element in elements:
+            if element is None or element.get_id() in known:
+                result.append(False)
+                continue
+            known.add(element.get_id())
+            new_rows.append(element.serialize())
+            result.append(True)
+        if new_rows:
+            if self._append_only:
+                self._append_rows(new_rows)
+            else:
+                self._save(data + new_rows)
+        return result
+
+    @writes_file
+    def replace_many(self, elements: Dict):
+        if self._wal is not None:
+            self._durable_apply([(id, [e.serialize()], "update") for id, e in elements.items()])
+            return
+        data = self._load()
+        if self._append_only:
+            existing = {row.get(self._id_field) for row in data}
+            targets = {id: e for id, e in elements.items() if id in existing}
+            if targets:
+                self._write_tombstones(list(targets))
+                self._append_rows([e.serialize() for e in targets.values()])
+                for id, e in targets.items():
+                    record_change(id, UPDATE, e.serialize)
+            return
+        replaced = set()
+        for i, d in enumerate(data):
+            id = d.get("_id")
+            if id in elements and id not in replaced:
+                data[i] = elements[id].serialize()
+                replaced.add(id)
+        self._save(data)
+        for id in replaced:
+            record_change(id, UPDATE, elements[id].serialize)
+
+    @writes_file
+    def delete_many(self, ids):
+        ids = set(ids)
+        if self._wal is not None:
+            self._durable_apply([(id, None, "upsert") for id in ids])
+            return
+        data = self._load()
+        if self._append_only:
+            existing = {row.get(self._id_field) for row in data}
+            targets = [id for id in ids if id in existing]
+            if targets:
+                self._write_tombstones(targets)
+                for id in targets:
+                    record_change(id, DELETE)
+            return
+        deleted = {d.get("_id") for d in data} & ids
+        self._save([d for d in data if d.get("_id") not in ids])
+        for id in deleted:
+            record_change(id, DELETE)
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        """
+        Escribe filas al final del archivo en bloques de `chunk_size`.
+
+        No reescribe los datos existentes: la cabecera solo se escribe si el
+        archivo aún no tiene una, y en memoria se mantiene como mucho un
+        bloque de filas. En modo durable cada bloque pasa por la bitácora,
+        agregado a las filas que ya tenga cada id.
+
+        Si el repositorio mantiene juntas las filas de cada id
+        (`_keep_grouped`), la primera escritura de la instancia lee los ids
+        del archivo; si alguna fila nueva queda separada de las de su id, el
+        archivo se reagrupa una vez al terminar.
+
+        Returns:
+        dict: Filas y bytes escritos, duración y filas por segundo
+        """
+        if self._wal is not None:
+            return self._durable_bulk_write(row_iterable, chunk_size)
+        start_time = time.time()
+        count = 0
+        with self._file_lock.exclusive(), self._lock:
+            if recording():
+                # Con eventos de cambio el bloque ya llega en memoria (ver
+                # publishes): se anota cada id antes de agregar sus filas
+                row_iterable = list(row_iterable)
+                self._refresh_file_state(track_ids=True)
+                self._record_written(row_iterable)
+            rows = iter(row_iterable)
+            first = next(rows, None)
+            if first is None:
+                return bulk_write_report(0, 0, start_time)
+            if self._keep_grouped:
+                self._refresh_file_state()
+            split = False
+            before = self._files_signature()
+            fieldnames = self._read_header()
+            if fieldnames:
+                mode = "a"
+                start_size = os.path.getsize(self.filename)
+            else:
+                mode = "w"
+                start_size = 0
+                fieldnames = list(first.keys())
+            with self._open(self.filename, mode) as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                if mode == "w":
+                    writer.writeheader()
+                buf = [first]
+                for row in rows:
+                    buf.append(row)
+                    if len(buf) >= chunk_size:
+                        writer.writerows(buf)
+                        count += len(buf)
+                        split = self._track_appended(len(buf), [row.get(self._id_field) for row in buf]) or split
+                        buf = []
+                if buf:
+                    writer.writerows(buf)
+                    count += len(buf)
+                    split = self._track_appended(len(buf), [row.get(self._id_field) for row in buf]) or split
+            self._mark_synced(before)
+            if self._cache is not None:
+                self._cache.invalidate()
+            bytes_written = os.path.getsize(self.filename) - start_size
+            if split:
+                self._save(self._read_rows())
+        return bulk_write_report(count, bytes_written, start_time)
+
+    def _durable_bulk_write(self, row_iterable, chunk_size):
+        start_time = time.time()
+        count = 0
+        bytes_written = 0
+        rows = iter(row_iterable)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            groups = {}
+            for row in chunk:
+                groups.setdefault(row.get(self._id_field), []).append(row)
+            start_size = os.path.getsize(self._wal.filename)
+            self._durable_apply([(id, id_rows, "append") for id, id_rows in groups.items()])
+            # Un checkpoint puede haber vaciado la bitácora
+            bytes_written += max(os.path.getsize(self._wal.filename) - start_size, 0)
+            count += len(chunk)
+        return bulk_write_report(count, bytes_written, start_time)
+
+    def bulk_write_frames(self, frames, chunk_size: int = 10000) -> Dict:
+        """
+        Como bulk_write_rows, con bloques ya columnares: cada DataFrame se
+        agrega al archivo con DataFrame.to_csv, alineado con la cabecera,
+        sin armar un dict por fila. En modo durable los bloques pasan por la
+        bitácora como filas.
+
+        Returns:
+        dict: Filas y bytes escritos, duración y filas por segundo
+        """
+        if self._wal is not None:
+            return super().bulk_write_frames(frames, chunk_size)
+        start_time = time.time()
+        count = 0
+        with self._file_lock.exclusive(), self._lock:
+            recorded = recording()
+            if self._keep_grouped or recorded:
+                self._refresh_file_state(track_ids=recorded)
+            split = False
+            before = self._files_signature()
+            fieldnames = self._read_header()
+            start_size = os.path.getsize(self.filename) if fieldnames else 0
+            for frame in frames:
+                if frame.empty:
+                    continue
+                if recorded:
+                    self._record_written(frame.astype(object).where(frame.notna(), None).to_dict("records"))
+                header = not fieldnames
+                if header:
+                    fieldnames = list(frame.columns)
+                with self._open(self.filename, "w" if header else "a") as f:
+                    # Mismo formato que csv.DictWriter: vacíos sin comillas y \r\n
+                    frame.reindex(columns=fieldnames).to_csv(f, header=header, index=False, lineterminator="\r\n")
+                count += len(frame)
+                split = self._track_appended(len(frame), frame[self._id_field].astype(str).tolist()) or split
+            self._mark_synced(before)
+            if self._cache is not None:
+                self._cache.invalidate()
+            bytes_written = os.path.getsize(self.filename) - start_size
+            if split:
+                self._save(self._read_rows())
+        return bulk_write_report(count, bytes_written, start_time)
+
+    def _track_appended(self, count, ids) -> bool:
+        # Actualiza el estado tras agregar filas; retorna si alguna quedó
+        # separada de las filas anteriores de su id
+        if self._row_count is not None:
+            self._row_count += count
+        if self._ids is None:
+            return False
+        if self._keep_grouped:
+            split = False
+            for id in ids:
+                split = self._breaks_grouping(id) or split
+            return split
+        self._ids.update(ids)
+        if ids:
+            self._last_id = ids[-1]
+        return False
@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+from typing import Dict
+import functools
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sin flock solo se coordina dentro del proceso
+    fcntl = None
+
+SHARED = "shared"
+EXCLUSIVE = "exclusive"
+
+class FileLock:
+    """
+    Lock de lectores/escritor entre procesos sobre un archivo de datos.
+
+    Usa flock (advisory) sobre un archivo `.lock` auxiliar: varios lectores
+    pueden tener el lock compartido a la vez y un escritor toma el exclusivo.
+    Cada adquisición abre su propio descriptor, así que también coordina
+    hilos del mismo proceso. Es reentrante por hilo: si el hilo ya tiene el
+    lock, las adquisiciones anidadas no esperan. Pedir el exclusivo
+    teniendo solo el compartido es un error: flock no convierte un lock de
+    forma atómica (lo suelta y vuelve a esperar), así que otro escritor
+    podría colarse en medio. Quien vaya a escribir toma el exclusivo desde
+    el principio, y el lock nunca se mantiene entre los yield de un
+    generador.
+
+    Registra cuántas veces se adquirió cada modo y cuánto se esperó.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._fallback = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {mode: {"acquisitions": 0, "wait_s": 0.0, "max_wait_s": 0.0} for mode in (SHARED, EXCLUSIVE)}
+
+    def shared(self):
+        return self._hold(SHARED)
+
+    def exclusive(self):
+        return self._hold(EXCLUSIVE)
+
+    def _flock(self, fd, mode):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if mode == SHARED else fcntl.LOCK_EX)
+
+    def _record(self, mode, waited):
+        with self._stats_lock:
+            stats = self._stats[mode]
+            stats["acquisitions"] += 1
+            stats["wait_s"] += waited
+            stats["max_wait_s"] = max(stats["max_wait_s"], waited)
+
+    @contextmanager
+    def _hold(self, mode):
+        state = getattr(self._local, "state", None)
+        if state is not None:
+            if mode == EXCLUSIVE and state["mode"] == SHARED:
+                raise RuntimeError(f"{self.path}: no se puede pedir el lock exclusivo teniendo el compartido")
+            yield
+            return
+
+        start = time.perf_counter()
+        if fcntl is None:
+            fd = None
+            self._fallback.acquire()
+        else:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._flock(fd, mode)
+            except BaseException:
+                os.close(fd)
+                raise
+        self._record(mode, time.perf_counter() - start)
+        self._local.state = {"fd": fd, "mode": mode}
+        try:
+            yield
+        finally:
+            self._local.state = None
+            if fd is None:
+                self._fallback.release()
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def stats(self) -> Dict:
+        """Adquisiciones y tiempo de espera (total y máximo) por modo."""
+        with self._stats_lock:
+            return {
+                mode: {
+                    "acquisitions": s["acquisitions"],
+                    "wait_s": round(s["wait_s"], 6),
+                    "max_wait_s": round(s["max_wait_s"], 6),
+                    "avg_wait_s": round(s["wait_s"] / s["acquisitions"], 6) if s["acquisitions"] else 0.0,
+                }
+                for mode, s in self._stats.items()
+            }
+
+
+def writes_file(method):
+    """
+    Ejecuta el método de un repositorio con el lock exclusivo de su archivo.
+
+    Cubre la operación completa (leer, modificar y escribir) para que otro
+    proceso no intercale escrituras. Los repositorios que no deben tomarlo
+    en sus escrituras públicas ponen `_lock_writes = False`.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not getattr(self, "_lock_writes", True):
+            return method(self, *args, **kwargs)
+        with self._file_lock.exclusive():
+            return method(self, *args, **kwargs)
+    return wrapper
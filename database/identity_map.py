@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+from .repository import RepositoryProvider
+from .change_events import change_events
+import threading
+
+class IdentityMap:
+    """
+    Caché de entidades por (entidad, id) para una sesión.
+
+    Cada id se carga del repositorio como mucho una vez y todas las
+    referencias a él comparten la misma instancia. Los ids que no existen
+    también se recuerdan, para no volver a buscarlos. Mientras la sesión
+    está abierta, las escrituras publicadas en change_events descartan la
+    entrada correspondiente.
+    """
+    def __init__(self):
+        self._objects: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def get(self, entity: str, id):
+        return self.get_many(entity, [id])[0]
+
+    def get_many(self, entity: str, ids: Iterable) -> List:
+        """
+        Resuelve varios ids de una entidad; los que faltan se cargan con un
+        solo find_many.
+
+        Args:
+        entity (str): Nombre registrado en RepositoryProvider ("Team", ...)
+        ids (iterable): Ids a resolver
+
+        Returns:
+        list: Las instancias en el mismo orden (None si no existen)
+        """
+        ids = list(ids)
+        with self._lock:
+            objects = self._objects.setdefault(entity, {})
+            missing = list(dict.fromkeys(id for id in ids if id not in objects))
+            self.misses += len(missing)
+            self.hits += len(ids) - len(missing)
+            if missing:
+                self.loads += 1
+        if missing:
+            found = RepositoryProvider.get(entity).find_many(missing)
+            with self._lock:
+                for id, element in zip(missing, found):
+                    # Si otra llamada ya la cargó se conserva esa instancia
+                    objects.setdefault(id, element)
+        return [objects.get(id) for id in ids]
+
+    def prefetch(self, entity: str, ids: Iterable):
+        """Carga en un solo lote los ids que todavía no están en el mapa."""
+        self.get_many(entity, set(ids))
+
+    def add(self, entity: str, element):
+        with self._lock:
+            self._objects.setdefault(entity, {})[element.get_id()] = element
+
+    def evict(self, entity: str, id=None):
+        with self._lock:
+            if id is None:
+                self._objects.pop(entity, None)
+            else:
+                self._objects.get(entity, {}).pop(id, None)
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "size": sum(len(objects) for objects in self._objects.values()),
+        }
+
+    def _on_change(self, event):
+        self.evict(event.entity, event.id)
+
+
+_sessions = threading.local()
+
+def current_identity_map() -> IdentityMap:
+    """Retorna el mapa de la sesión abierta en este hilo, o None."""
+    stack = getattr(_sessions, "stack", None)
+    return stack[-1] if stack else None
+
+@contextmanager
+def identity_session(identity_map: IdentityMap = None):
+    """
+    Abre una sesión en el hilo actual: dentro de ella las referencias
+    perezosas de los modelos (Season.get_team, Team.get_coach, ...) se
+    resuelven a través de un IdentityMap.
+
+    Args:
+    identity_map (IdentityMap, optional): Mapa a usar; por defecto uno nuevo
+
+    Returns:
+    IdentityMap: El mapa de la sesión (con sus contadores)
+    """
+    identity_map = identity_map or IdentityMap()
+    stack = getattr(_sessions, "stack", None)
+    if stack is None:
+        stack = _sessions.stack = []
+    unsubscribe = change_events.subscribe(identity_map._on_change)
+    stack.append(identity_map)
+    try:
+        yield identity_map
+    finally:
+        stack.pop()
+        unsubscribe()
+
+def resolve_reference(entity: str, id):
+    """Carga una referencia a otra entidad, compartida si hay una sesión abierta."""
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        return identity_map.get(entity, id)
+    return RepositoryProvider.get(entity).find(id)
+
+def resolve_references(entity: str, ids: Iterable) -> List:
+    """Como resolve_reference para varios ids, con un solo find_many."""
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        return identity_map.get_many(entity, ids)
+    return RepositoryProvider.get(entity).find_many(ids)
@@ -1,80 +1,191 @@
 from typing import Dict, Iterable
-from .repository import Repository, RepositoryProvider
+from .repository import Repository, RepositoryProvider, bulk_write_report
+from .row_cache import RowCache
+from .query import parse_filters, compile_predicate, project
+from .compressed_file import detect_compression, with_compression, open_data_file
+from .file_lock import FileLock, writes_file
+from .change_events import INSERT, UPDATE, DELETE, recording, record_change
 from models import Serializable
 import json
 import os
+import threading
+import time
 
 class JSONRepository(Repository):
-    def __init__(self, cls: Serializable):
+    _id_field = "_id"
+
+    def __init__(self, cls: Serializable, cached: bool = False, compression: str = None):
         self.cls = cls
+        self._lock = threading.Lock()
         folder = "data"
         os.makedirs(folder, exist_ok=True)
-        self.filename = os.path.join(folder, f"{cls.__name__.lower()}s.json")
+        self.filename = with_compression(os.path.join(folder, f"{cls.__name__.lower()}s.json"), compression)
+        self.compression = detect_compression(self.filename)
         if not os.path.exists(self.filename):
-            with open(self.filename, "w") as f:
+            with open_data_file(self.filename, "w", self.compression) as f:
                 json.dump([], f)
+        # En modo cacheado el documento se mantiene en memoria y solo se
+        # vuelve a leer si cambia el mtime o el tamaño del archivo
+        self._cache = RowCache(self.filename, self._id_field) if cached else None
+        self._file_lock = FileLock(f"{self.filename}.lock")
         RepositoryProvider.register(cls.__name__.capitalize(), self)
     
     def _load(self):
-        with open(self.filename, "r") as f:
-            return json.load(f)
+        if self._cache is not None and self._cache.is_fresh():
+            return list(self._cache.rows())
+        with self._file_lock.shared():
+            signature = self._cache.signature() if self._cache is not None else None
+            with open_data_file(self.filename, "r", self.compression) as f:
+                data = json.load(f)
+        if self._cache is not None:
+            self._cache.store(data, signature)
+        return list(data)
 
     def _save(self, data):
-        with open(self.filename, "w") as f:
-            json.dump(data, f, indent=2)
+        with self._file_lock.exclusive():
+            with open_data_file(self.filename, "w", self.compression) as f:
+                json.dump(data, f, indent=2)
+            if self._cache is not None:
+                self._cache.store(list(data), self._cache.signature())
+
+    def _find_rows(self, id):
+        if self._cache is not None:
+            self._load()
+            return list(self._cache.lookup(id))
+        return [element for element in self._load() if element[self._id_field] == id]
 
     def find(self, id):
-        data = self._load()
-        for element in data:
-        
-            if element["_id"] == id:
-                return self.cls.deserialize(element)
-        return None
+        rows = self._find_rows(id)
+        if not rows:
+            return None
+        return self.cls.deserialize(dict(rows[0]))
     
     def findAll(self):
-        return [self.cls.deserialize(element) for element in self._load()]
+        return [self.cls.deserialize(dict(element)) for element in self._load()]
 
+    @writes_file
     def save(self, element):
         if element == None:
             return False
-        data: list = self._load()
         id = element.get_id()
         print(element.get_id())
-        for e in data:
-            if e["_id"] == id:
-                return False
+        if self._find_rows(id):
+            return False
+        data: list = self._load()
         data.append(element.serialize())
         
         self._save(data)
         return True
 
+    @writes_file
     def delete(self, id):
         data = self._load()
         new_data = [d for d in data if d["_id"] != id]
         self._save(new_data)
+        if len(new_data) != len(data):
+            record_change(id, DELETE)
 
+    @writes_file
     def replace(self, id, element):
         data = self._load()
         for i, d in enumerate(data):
             if d["_id"] == id:
                 data[i] = element.serialize()
+                record_change(id, UPDATE, data[i])
                 break
         self._save(data)
 
-    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> None:
-        with self._lock:
+    def find_many(self, ids):
+        ids = list(ids)
+        if self._cache is not None:
+            self._load()
+            found = {id: self._cache.lookup(id) for id in ids}
+        else:
+            wanted = set(ids)
+            found = {}
+            for element in self._load():
+                if element[self._id_field] in wanted:
+                    found.setdefault(element[self._id_field], []).append(element)
+        return [self.cls.deserialize(dict(found[id][0])) if found.get(id) else None for id in ids]
+
+    @writes_file
+    def save_many(self, elements):
+        data = self._load()
+        known = {e["_id"] for e in data}
+        result = []
+        for element in elements:
+            if element is None or element.get_id() in known:
+                result.append(False)
+                continue
+            known.add(element.get_id())
+            data.append(element.serialize())
+            result.append(True)
+        if any(result):
+            self._save(data)
+        return result
+
+    @writes_file
+    def replace_many(self, elements):
+        data = self._load()
+        replaced = set()
+        for i, d in enumerate(data):
+            if d["_id"] in elements and d["_id"] not in replaced:
+                data[i] = elements[d["_id"]].serialize()
+                replaced.add(d["_id"])
+                record_change(d["_id"], UPDATE, data[i])
+        self._save(data)
+
+    @writes_file
+    def delete_many(self, ids):
+        ids = set(ids)
+        data = self._load()
+        self._save([d for d in data if d["_id"] not in ids])
+        for id in {d["_id"] for d in data} & ids:
+            record_change(id, DELETE)
+
+    def _read_all(self):
+        try:
+            return self._load()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def page(self, cursor=None, limit: int = 50):
+        # El documento se lee completo, pero solo se construye la página
+        data = self._load()
+        start = int(cursor or 0)
+        end = start + limit
+        return [self.cls.deserialize(dict(row)) for row in data[start:end]], (str(end) if end < len(data) else None)
+
+    def query(self, columns=None, **filters):
+        predicate = compile_predicate(parse_filters(filters))
+        rows = (row for row in self._load() if predicate(row))
+        if columns is not None:
+            return project(rows, columns)
+        return (self.cls.deserialize(dict(row)) for row in rows)
+
+    def warm_up(self):
+        if self._cache is not None:
+            self._load()
+
+    def lock_stats(self):
+        return self._file_lock.stats()
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        # Un arreglo JSON no admite agregar al final: se reescribe una sola vez
+        start_time = time.time()
+        with self._file_lock.exclusive(), self._lock:
             existing = self._read_all()
-            buf = []
+            known = {row.get(self._id_field) for row in existing} if recording() else None
             count = 0
             for row in row_iterable:
-                buf.append(row)
+                existing.append(row)
                 count += 1
-                if len(buf) >= chunk_size:
-                    existing.extend(buf)
-                    with open(self.filename, "w", encoding="utf-8") as f:
-                        json.dump(existing, f, ensure_ascii=False)
-                    buf = []
-            if buf:
-                existing.extend(buf)
-                with open(self.filename, "w", encoding="utf-8") as f:
-                    json.dump(existing, f, ensure_ascii=False)
\ No newline at end of file
+                if known is not None:
+                    id = row.get(self._id_field)
+                    record_change(id, UPDATE if id in known else INSERT, row)
+                    known.add(id)
+            with open_data_file(self.filename, "w", self.compression, encoding="utf-8") as f:
+                json.dump(existing, f, ensure_ascii=False)
+            if self._cache is not None:
+                self._cache.invalidate()
+        return bulk_write_report(count, os.path.getsize(self.filename), start_time)
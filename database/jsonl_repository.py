@@ -0,0 +1,264 @@
+from typing import Dict, Iterable, Iterator
+from .repository import Repository, RepositoryProvider, bulk_write_report
+from .file_lock import FileLock
+from .change_events import INSERT, UPDATE, DELETE, recording, record_change
+from .query import parse_filters, compile_predicate, project
+from models import Serializable
+import json
+import os
+import threading
+import time
+
+_DELETED = "_deleted"
+
+class JSONLRepository(Repository):
+    """
+    Repositorio en formato JSON Lines: un registro por línea.
+
+    Altas, reemplazos y bajas se agregan al final del archivo. La última
+    línea de cada id es la vigente y las bajas se marcan con "_deleted".
+    Un índice en memoria id -> offset permite leer un registro sin recorrer
+    el archivo, y un compactador en segundo plano lo reescribe cuando las
+    líneas obsoletas superan `compact_ratio` del total.
+
+    Entre procesos se coordina con un lock de archivo: compartido para leer
+    y exclusivo para agregar o compactar (siempre antes que `_lock`).
+    """
+    _id_field = "_id"
+
+    def __init__(self, cls: Serializable, compact_ratio: float = 0.5, compact_min_lines: int = 1000):
+        self.cls = cls
+        self._lock = threading.RLock()
+        folder = "data"
+        os.makedirs(folder, exist_ok=True)
+        self.filename = os.path.join(folder, f"{cls.__name__.lower()}s.jsonl")
+        if not os.path.exists(self.filename):
+            open(self.filename, "wb").close()
+        self._compact_ratio = compact_ratio
+        self._compact_min_lines = compact_min_lines
+        self._offsets: Dict[str, int] = {}
+        self._lines = 0
+        self._signature = None
+        self._compactor = None
+        self._file_lock = FileLock(f"{self.filename}.lock")
+        RepositoryProvider.register(cls.__name__.capitalize(), self)
+
+    def _stat(self):
+        st = os.stat(self.filename)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _decode(self, line: bytes):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            # Línea incompleta (por ejemplo, una escritura interrumpida)
+            return None
+
+    def _encode(self, record: Dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _index(self) -> Dict[str, int]:
+        # Solo se recorre el archivo si cambió desde la última lectura
+        with self._file_lock.shared(), self._lock:
+            signature = self._stat()
+            if signature == self._signature:
+                return self._offsets
+            offsets = {}
+            lines = 0
+            offset = 0
+            with open(self.filename, "rb") as f:
+                for line in f:
+                    start = offset
+                    offset += len(line)
+                    record = self._decode(line)
+                    if record is None:
+                        continue
+                    lines += 1
+                    self._track(offsets, record, start)
+            self._offsets = offsets
+            self._lines = lines
+            self._signature = signature
+            return offsets
+
+    def _track(self, offsets, record, offset):
+        id = record.get(self._id_field)
+        if id is None:
+            # Sin id no se puede indexar; bulk_write_rows ya no las escribe
+            return
+        if record.get(_DELETED):
+            offsets.pop(id, None)
+        else:
+            offsets[id] = offset
+
+    def _record(self, offsets, record):
+        # Evento de cambio del registro según lo que había antes en el índice
+        id = record.get(self._id_field)
+        if record.get(_DELETED):
+            if id in offsets:
+                record_change(id, DELETE)
+        elif id is not None:
+            record_change(id, UPDATE if id in offsets else INSERT, record)
+
+    def _append(self, records: Iterable[Dict]) -> int:
+        count = 0
+        with self._file_lock.exclusive(), self._lock:
+            offsets = self._index()
+            recorded = recording()
+            with open(self.filename, "ab") as f:
+                offset = f.tell()
+                for record in records:
+                    line = self._encode(record)
+                    f.write(line)
+                    if recorded:
+                        self._record(offsets, record)
+                    self._track(offsets, record, offset)
+                    offset += len(line)
+                    count += 1
+            self._lines += count
+            self._signature = self._stat()
+        self._maybe_compact()
+        return count
+
+    def _read_at(self, offset: int):
+        with open(self.filename, "rb") as f:
+            f.seek(offset)
+            return self._decode(f.readline())
+
+    def iter_records(self, offset: int = 0) -> Iterator[Dict]:
+        """Itera perezosamente los registros vigentes, en orden de escritura."""
+        for record, _ in self._iter_from(offset):
+            yield record
+
+    def _iter_from(self, offset: int):
+        # Entrega cada registro vigente junto con el offset de la línea siguiente
+        with self._file_lock.shared(), self._lock:
+            live = set(self._index().values())
+            f = open(self.filename, "rb")
+        with f:
+            f.seek(offset)
+            for line in f:
+                start = offset
+                offset += len(line)
+                # Las líneas obsoletas se descartan sin decodificarlas
+                if start in live:
+                    record = self._decode(line)
+                    if record is not None:
+                        yield record, offset
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Serializable]:
+        # El archivo ya se lee en streaming; batch_size se acepta por
+        # compatibilidad con Repository.iter_all
+        for record in self.iter_records():
+            yield self.cls.deserialize(record)
+
+    def page(self, cursor: str = None, limit: int = 50):
+        """Página de elementos; el cursor es el offset de la línea siguiente."""
+        items = []
+        next_cursor = None
+        records = self._iter_from(int(cursor or 0))
+        for record, after in records:
+            if len(items) == limit:
+                records.close()
+                return items, next_cursor
+            items.append(self.cls.deserialize(record))
+            next_cursor = str(after)
+        return items, None
+
+    def find(self, id):
+        with self._file_lock.shared(), self._lock:
+            offset = self._index().get(id)
+            if offset is None:
+                return None
+            record = self._read_at(offset)
+        return self.cls.deserialize(record) if record is not None else None
+
+    def findAll(self):
+        return list(self.iter_all())
+
+    def query(self, columns=None, **filters):
+        predicate = compile_predicate(parse_filters(filters))
+        records = (record for record in self.iter_records() if predicate(record))
+        if columns is not None:
+            return project(records, columns)
+        return (self.cls.deserialize(record) for record in records)
+
+    def save(self, element):
+        if element is None:
+            return False
+        with self._file_lock.exclusive(), self._lock:
+            if element.get_id() in self._index():
+                return False
+            self._append([element.serialize()])
+        return True
+
+    def delete(self, id):
+        with self._file_lock.exclusive(), self._lock:
+            if id in self._index():
+                self._append([{self._id_field: id, _DELETED: True}])
+
+    def replace(self, id, element):
+        with self._file_lock.exclusive(), self._lock:
+            if id in self._index():
+                self._append([element.serialize()])
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        """
+        Agrega registros ya serializados. Los que no traen id se omiten y se
+        cuentan en "rows_skipped" del reporte.
+        """
+        start_time = time.time()
+        start_size = os.path.getsize(self.filename)
+        skipped = 0
+
+        def with_id(rows):
+            nonlocal skipped
+            for row in rows:
+                if row.get(self._id_field) is None:
+                    skipped += 1
+                    continue
+                yield row
+
+        count = self._append(with_id(row_iterable))
+        report = bulk_write_report(count, os.path.getsize(self.filename) - start_size, start_time)
+        report["rows_skipped"] = skipped
+        return report
+
+    def warm_up(self):
+        self._index()
+
+    def lock_stats(self):
+        return self._file_lock.stats()
+
+    def compact(self):
+        """
+        Reescribe el archivo dejando solo los registros vigentes.
+
+        Escribe en un archivo temporal y lo reemplaza de forma atómica, así
+        que una interrupción a mitad de la compactación no pierde datos.
+        """
+        with self._file_lock.exclusive(), self._lock:
+            tmp = f"{self.filename}.tmp"
+            offsets = {}
+            offset = 0
+            with open(tmp, "wb") as out:
+                for record in self.iter_records():
+                    line = self._encode(record)
+                    out.write(line)
+                    offsets[record.get(self._id_field)] = offset
+                    offset += len(line)
+            os.replace(tmp, self.filename)
+            self._offsets = offsets
+            self._lines = len(offsets)
+            self._signature = self._stat()
+
+    def _maybe_compact(self):
+        garbage = self._lines - len(self._offsets)
+        if garbage < self._compact_min_lines or garbage < self._lines * self._compact_ratio:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
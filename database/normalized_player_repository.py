@@ -0,0 +1,315 @@
+from typing import Dict, Iterable, Iterator, List
+from .repository import Repository, RepositoryProvider, bulk_write_report
+from .player_repository import PlayerRepository, _converter
+from .change_events import captured_changes, record_change, recording
+from .query import parse_filters
+from models import Player, Position
+import functools
+import os
+import time
+
+PROFILE_COLUMNS = ("player_id", "player_name", "password", "age", "position")
+# Columnas que solo están en el perfil. La edad también queda en cada
+# temporada: es la edad en ese año, que usan los análisis
+_PROFILE_ONLY_COLUMNS = ("player_name", "password", "position")
+
+
+class _ProfileTable(PlayerRepository):
+    # Reutiliza las escrituras de PlayerRepository (modos, lotes, locks);
+    # solo cambia la forma de las filas: una por jugador
+    indexed_fields = ("position", "age")
+
+    def _player_to_rows(self, player: Player) -> List[Dict]:
+        position = player.get_position()
+        return [{
+            "player_id": player.get_id(),
+            "player_name": player.get_name(),
+            "password": player._password,
+            "age": player.get_age(),
+            "position": position.value if position else None,
+        }]
+
+
+class _SeasonTable(PlayerRepository):
+    # Una fila por temporada, sin los datos del jugador salvo la edad
+    indexed_fields = ("team_id", "team_name", "season_year", "age")
+
+    def _player_to_rows(self, player: Player) -> List[Dict]:
+        return [
+            {column: value for column, value in row.items() if column not in _PROFILE_ONLY_COLUMNS}
+            for row in super()._player_to_rows(player)
+        ]
+
+
+class NormalizedPlayerRepository(Repository):
+    """
+    Jugadores guardados en dos archivos: data/player_profiles.csv (una fila
+    por jugador) y data/player_seasons.csv (una fila por temporada, con
+    player_id, año, edad, equipo y estadísticas).
+
+    Cambiar el nombre o la edad solo reescribe el archivo de perfiles (en
+    modo append, agrega una fila), y las temporadas solo se escriben si
+    cambiaron. query() con columnas de estadísticas lee únicamente el
+    archivo de temporadas. Para pasar del CSV por temporada usar
+    migrate_from().
+    """
+    indexed_fields = PlayerRepository.indexed_fields
+    cls = Player
+    _id_field = "player_id"
+
+    def __init__(self, cached: bool = False, append_only: bool = False, compact_every: int = 1000,
+                 durable: bool = False, checkpoint_every: int = 1000, compression: str = None):
+        folder = "data"
+        options = dict(cached=cached, append_only=append_only, compact_every=compact_every,
+                       durable=durable, checkpoint_every=checkpoint_every, compression=compression)
+        self.profiles = _ProfileTable(filename=os.path.join(folder, "player_profiles.csv"), **options)
+        self.seasons = _SeasonTable(filename=os.path.join(folder, "player_seasons.csv"), **options)
+        # Los eventos de cambio se publican por jugador, no por tabla
+        self.profiles.events = None
+        self.seasons.events = None
+        # Las tablas se registran como "Player" al crearse; el repositorio
+        # visible para los servicios es este
+        RepositoryProvider.register("Player", self)
+
+    def _to_player(self, profile: Dict, season_rows: List[Dict]) -> Player:
+        position = profile.get("position")
+        return Player.from_storage(
+            id=profile["player_id"],
+            name=profile["player_name"],
+            password=profile["password"],
+            age=int(profile["age"]),
+            position=Position(position) if position else None,
+            seasons=self.seasons._rows_to_seasons(season_rows),
+        )
+
+    def _players_for(self, ids: List[str]) -> List[Player]:
+        ids = list(ids)
+        if not ids:
+            return []
+        profiles = self.profiles._rows_by_id(ids)
+        seasons = self.seasons._rows_by_id(ids)
+        return [self._to_player(profiles[pid][-1], seasons[pid]) if profiles[pid] else None for pid in ids]
+
+    def find(self, player_id: str) -> Player:
+        return self._players_for([player_id])[0]
+
+    def find_many(self, ids) -> List[Player]:
+        return self._players_for(ids)
+
+    def findAll(self) -> List[Player]:
+        profiles = {row["player_id"]: row for row in self.profiles._iter_rows()}
+        # Las temporadas se agrupan por jugador para unirlas a los perfiles
+        seasons = {}
+        for row in self.seasons._iter_rows():
+            seasons.setdefault(row.get("player_id"), []).append(row)
+        return [self._to_player(profile, seasons.get(pid, [])) for pid, profile in profiles.items()]
+
+    def _split_filters(self, filters: Dict):
+        profile, season = {}, {}
+        for (key, value), (column, _, _) in zip(filters.items(), parse_filters(filters)):
+            # Como en PlayerRepository, la edad se compara por temporada
+            (profile if column in PROFILE_COLUMNS and column != "age" else season)[key] = value
+        return profile, season
+
+    def find_by(self, **filters) -> List[Player]:
+        unknown = set(filters) - set(self.indexed_fields)
+        if unknown:
+            raise ValueError(f"Columnas no indexadas: {', '.join(sorted(unknown))}")
+        profile, season = self._split_filters(filters)
+        ids = self.seasons._matching_ids(season) if season else None
+        if profile:
+            matching = set(self.profiles._matching_ids(profile))
+            ids = [pid for pid in ids if pid in matching] if ids is not None else self.profiles._matching_ids(profile)
+        if ids is None:
+            return self.findAll()
+        return self._players_for(ids)
+
+    def find_by_team(self, team_id, season_year: int = None) -> List[Player]:
+        season = {} if season_year is None else {"season_year": season_year}
+        ids = self.seasons._matching_ids({"team_id": team_id, **season})
+        ids += [pid for pid in self.seasons._matching_ids({"team_name": team_id, **season}) if pid not in ids]
+        return self._players_for(ids)
+
+    def find_by_position(self, position, season_year: int = None) -> List[Player]:
+        filters = {"position": position}
+        if season_year is not None:
+            filters["season_year"] = season_year
+        return self.find_by(**filters)
+
+    def query(self, columns: List[str] = None, **filters) -> Iterator:
+        """
+        Igual que PlayerRepository.query. Los filtros sobre columnas del
+        jugador se resuelven en el archivo de perfiles y el resto sobre las
+        temporadas; si `columns` solo pide columnas de temporada, el archivo
+        de perfiles no se lee para proyectar.
+        """
+        profile, season = self._split_filters(filters)
+        allowed = {row["player_id"]: row for row in self.profiles._query_rows(profile)} if profile else None
+        if columns is None and not season:
+            return iter(self._players_for(allowed if allowed is not None else [r["player_id"] for r in self.profiles._iter_rows()]))
+        rows = self.seasons._query_rows(season)
+        if allowed is not None:
+            rows = (row for row in rows if row.get("player_id") in allowed)
+        if columns is None:
+            return self._iter_players(rows)
+        return self._project(rows, columns, allowed)
+
+    def _iter_players(self, rows) -> Iterator[Player]:
+        ids = list(dict.fromkeys(row.get("player_id") for row in rows))
+        for player in self._players_for(ids):
+            if player is not None:
+                yield player
+
+    def _project(self, rows, columns: List[str], profiles: Dict = None) -> Iterator[Dict]:
+        decoders = [(column, _converter(column)) for column in columns]
+        needs_profile = any(column in _PROFILE_ONLY_COLUMNS for column in columns)
+        if needs_profile and profiles is None:
+            profiles = {row["player_id"]: row for row in self.profiles._iter_rows()}
+        for row in rows:
+            if needs_profile:
+                row = {**profiles.get(row.get("player_id"), {}), **row}
+            yield {column: None if row.get(column) in ("", None) else decode(row.get(column)) for column, decode in decoders}
+
+    def save(self, player: Player) -> bool:
+        if player is None or not self.profiles.save(player):
+            return False
+        self.seasons.save(player)
+        return True
+
+    def save_many(self, players) -> List[bool]:
+        players = list(players)
+        saved = self.profiles.save_many(players)
+        self.seasons.save_many([player for player, ok in zip(players, saved) if ok])
+        return saved
+
+    def _seasons_changed(self, id: str, player: Player) -> bool:
+        current = self.seasons._find_rows(id)
+        new_rows = self.seasons._player_to_rows(player)
+        if len(current) != len(new_rows):
+            return True
+        header = list(current[0].keys()) if current else []
+        return self.seasons._as_csv_rows(new_rows, header) != [dict(row) for row in current]
+
+    def _record(self, changes, rows: Dict):
+        # Las tablas anotan sus cambios por id; aquí se anotan una vez por
+        # jugador, con la operación combinada y la fila del jugador
+        if changes is not None:
+            for id, operation in changes.operations().items():
+                record_change(id, operation, rows.get(id))
+
+    def replace(self, id: str, player: Player):
+        with captured_changes() as changes:
+            self.profiles.replace(id, player)
+            # Una actualización de perfil no toca el archivo de temporadas
+            if self._seasons_changed(id, player):
+                self.seasons.replace(id, player)
+        self._record(changes, {id: player.serialize})
+
+    def replace_many(self, players: Dict[str, Player]):
+        with captured_changes() as changes:
+            self.profiles.replace_many(players)
+            changed = {id: player for id, player in players.items() if self._seasons_changed(id, player)}
+            if changed:
+                self.seasons.replace_many(changed)
+        self._record(changes, {id: player.serialize for id, player in players.items()})
+
+    def delete(self, id: str):
+        with captured_changes() as changes:
+            self.profiles.delete(id)
+            self.seasons.delete(id)
+        self._record(changes, {})
+
+    def delete_many(self, ids):
+        ids = list(ids)
+        with captured_changes() as changes:
+            self.profiles.delete_many(ids)
+            self.seasons.delete_many(ids)
+        self._record(changes, {})
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        """
+        Escribe filas jugador-temporada (el formato de PlayerRepository)
+        separándolas en perfiles y temporadas, en bloques de `chunk_size`.
+        Los jugadores que ya tienen perfil solo agregan temporadas, y las
+        temporadas que ya están (mismo jugador y año) se omiten.
+        """
+        start_time = time.time()
+        known = {row.get("player_id") for row in self.profiles._iter_rows()}
+        known_seasons = {(row.get("player_id"), str(row.get("season_year"))) for row in self.seasons._iter_rows()}
+        changes_wanted = recording()
+        count = 0
+        bytes_written = 0
+        profiles, seasons = [], []
+        # Filas de entrada de cada jugador del bloque, para los eventos de cambio
+        written = {}
+
+        def flush():
+            nonlocal bytes_written
+            with captured_changes() as changes:
+                for table, rows in ((self.profiles, profiles), (self.seasons, seasons)):
+                    if rows:
+                        bytes_written += table.bulk_write_rows(rows, chunk_size)["bytes_written"]
+                        rows.clear()
+            self._record(changes, {
+                pid: functools.partial(self._entity_row, rows) for pid, rows in written.items()
+            })
+            written.clear()
+
+        for row in row_iterable:
+            pid = row.get("player_id")
+            season = (pid, str(row.get("season_year")))
+            if season in known_seasons:
+                continue
+            known_seasons.add(season)
+            if pid not in known:
+                known.add(pid)
+                profiles.append({column: row.get(column) for column in PROFILE_COLUMNS})
+            seasons.append({column: value for column, value in row.items() if column not in _PROFILE_ONLY_COLUMNS})
+            if changes_wanted:
+                written.setdefault(pid, []).append(row)
+            count += 1
+            if len(seasons) >= chunk_size:
+                flush()
+        flush()
+        return bulk_write_report(count, bytes_written, start_time)
+
+    def _entity_row(self, rows: List[Dict]) -> Dict:
+        # Filas jugador-temporada de entrada -> el jugador serializado
+        return self.seasons._rows_to_player(rows).serialize()
+
+    @classmethod
+    def migrate_from(cls, source: str = os.path.join("data", "players.csv"), chunk_size: int = 10000, **options) -> Dict:
+        """
+        Copia un CSV jugador-temporada al formato normalizado.
+
+        El archivo original no se modifica. Los jugadores y las temporadas
+        que ya existen en el destino no se duplican, así que se puede volver
+        a ejecutar.
+
+        Args:
+        source (str): CSV con una fila por temporada
+        chunk_size (int): Filas por bloque de escritura
+        **options: Opciones del repositorio destino (cached, compression, ...)
+
+        Returns:
+        dict: Reporte de bulk_write_rows
+        """
+        rows = PlayerRepository(filename=source)._iter_rows()
+        repository = cls(**options)
+        return repository.bulk_write_rows(rows, chunk_size)
+
+    def warm_up(self):
+        self.profiles.warm_up()
+        self.seasons.warm_up()
+
+    def compact(self):
+        self.profiles.compact()
+        self.seasons.compact()
+
+    def checkpoint(self):
+        self.profiles.checkpoint()
+        self.seasons.checkpoint()
+
+    def close(self):
+        self.profiles.close()
+        self.seasons.close()
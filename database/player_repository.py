@@ -1,42 +1,168 @@
 from .csv_repository import CSVRepository
+from .change_events import INSERT, UPDATE, DELETE, record_change
+from .columnar_store import ColumnarSeasonStore
+from .file_lock import writes_file
+from .query import parse_filters, compile_predicate
 from models import Player, Season, Position
-from typing import Dict, List
+from contextlib import closing
+from itertools import groupby
+from typing import Dict, Iterator, List
+import os
+import pandas as pd
+
+def _decode_value(value):
+    # Los números del CSV vuelven como int o float; el resto queda igual
+    try:
+        return float(value) if '.' in str(value) else int(value)
+    except (ValueError, TypeError):
+        return value
+
+def _to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        # Por ejemplo "12.0" escrito por otra herramienta
+        return _decode_value(value)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def _to_str(value):
+    return value
+
+_CONVERTERS = {int: _to_int, float: _to_float, str: _to_str}
+
+# Esquema de las filas jugador-temporada: columna -> tipo. Las columnas que
+# no figuran aquí se decodifican adivinando el tipo como antes.
+SEASON_ROW_SCHEMA = {
+    "player_id": str,
+    "player_name": str,
+    "age": int,
+    "password": str,
+    "position": str,
+    "team_id": str,
+    "team_name": str,
+    "season_year": int,
+    "games": int,
+    "minutes": int,
+    "goals": int,
+    "assists": int,
+    "pre_assists": int,
+    "clearances": int,
+    "chances_created": int,
+    "shots": int,
+    "shots_on_target": int,
+    "pass_accuracy": float,
+    "yellow_cards": int,
+    "red_cards": int,
+    "injured": int,
+    "score": float,
+}
+
+_INT_STAT_COLUMNS = frozenset(column for column, column_type in SEASON_ROW_SCHEMA.items() if column_type is int)
+
+# Columnas que pertenecen al jugador o a la temporada y no a sus estadísticas.
+# team_name no está: viaja con las estadísticas extra, porque el equipo de
+# la temporada (Season._team) se guarda por id en team_id
+_NON_STAT_COLUMNS = frozenset({"player_id", "player_name", "password", "age", "position", "team_id", "season_year"})
+
+def _converter(column: str):
+    column_type = SEASON_ROW_SCHEMA.get(column)
+    return _CONVERTERS[column_type] if column_type else _decode_value
+
+def _player_id(row: Dict):
+    return row.get("player_id")
+
+def _decode_stats(row: Dict, decoders) -> Dict:
+    # Omite los vacíos y tolera valores fuera del esquema
+    stats = {}
+    for column, decode in decoders:
+        value = row.get(column)
+        if value != '' and value is not None:
+            stats[column] = decode(value)
+    return stats
 
 class PlayerRepository(CSVRepository):
-    def __init__(self):
-        super().__init__(Player)
+    _id_field = "player_id"
+    # Cada jugador ocupa una fila por temporada y esas filas se mantienen
+    # juntas, así findAll y page() arman los jugadores de corrido
+    _keep_grouped = True
+    # En modo cacheado se mantienen índices secundarios sobre estas columnas
+    indexed_fields = ("team_id", "team_name", "position", "season_year", "age")
+
+    def __init__(self, cached: bool = False, append_only: bool = False, compact_every: int = 1000,
+                 durable: bool = False, checkpoint_every: int = 1000, filename: str = None, compression: str = None):
+        super().__init__(Player, cached=cached, append_only=append_only, compact_every=compact_every,
+                         durable=durable, checkpoint_every=checkpoint_every, filename=filename, compression=compression)
+        # Conversores de estadísticas por cabecera, armados una sola vez
+        self._stat_decoders = {}
     
+    @writes_file
     def save(self, player: Player) -> bool:
         if player is None:
             return False
         
-        data = self._load()
-        player_id = player.get_id()
-        for row in data:
-            if row.get("player_id") == player_id:
-                return False
+        if self._wal is not None:
+            return self._durable_write(player.get_id(), self._player_to_rows(player), mode="insert")
+
+        if self._has_id(player.get_id()):
+            return False
         
         rows = self._player_to_rows(player)
-        self.bulk_write_rows(rows)
+        if self._append_only:
+            self._append_rows(rows)
+        else:
+            self.bulk_write_rows(rows)
         return True
     
+    @writes_file
     def replace(self, id: str, player: Player):
+        if self._wal is not None:
+            self._durable_write(id, self._player_to_rows(player))
+            return
+
+        if self._append_only:
+            existed = self._has_id(id)
+            if existed:
+                self._write_tombstone(id)
+            self._append_rows(self._player_to_rows(player))
+            record_change(id, UPDATE if existed else INSERT, player.serialize)
+            return
+
         data = self._load()
+        size = len(data)
         data = [row for row in data if row.get("player_id") != id]
+        existed = len(data) != size
         
         rows = self._player_to_rows(player)
         data.extend(rows)
         
         self._save(data)
+        record_change(id, UPDATE if existed else INSERT, player.serialize)
     
+    @writes_file
     def delete(self, id: str):
+        if self._wal is not None:
+            self._durable_write(id)
+            return
+
+        if self._append_only:
+            if self._has_id(id):
+                self._write_tombstone(id)
+                record_change(id, DELETE)
+            return
+
         data = self._load()
         new_data = [row for row in data if row.get("player_id") != id]
         self._save(new_data)
+        if len(new_data) != len(data):
+            record_change(id, DELETE)
     
     def find(self, player_id: str) -> Player:
-        data = self._load()
-        player_rows = [row for row in data if row.get("player_id") == player_id]
+        player_rows = self._find_rows(player_id)
         
         if not player_rows:
             return None
@@ -44,75 +170,355 @@ class PlayerRepository(CSVRepository):
         return self._rows_to_player(player_rows)
     
     def findAll(self) -> List[Player]:
-        data = self._load()
-        
-        players_dict = {}
-        for row in data:
-            pid = row.get("player_id")
-            if pid not in players_dict:
-                players_dict[pid] = []
-            players_dict[pid].append(row)
-        
+        # Las escrituras mantienen contiguas las filas de cada jugador (ver
+        # _keep_grouped), así que se arman de corrido sin agrupar en memoria.
+        # Un archivo escrito por otra herramienta puede no cumplirlo: entonces
+        # se agrupa por id, y compact() lo deja ordenado
         players = []
-        for player_rows in players_dict.values():
-            player = self._rows_to_player(player_rows)
-            if player:
-                players.append(player)
-        
+        seen = set()
+        for pid, rows in groupby(self._iter_rows(), key=_player_id):
+            if pid in seen:
+                rows = self._grouped(list(self._iter_rows()))
+                return [self._rows_to_player(list(group)) for _, group in groupby(rows, key=_player_id)]
+            seen.add(pid)
+            players.append(self._rows_to_player(list(rows)))
         return players
+
+    def page(self, cursor: str = None, limit: int = 50):
+        """
+        Retorna una página de jugadores y el cursor de la siguiente.
+
+        Las filas de cada jugador están contiguas, así que se leen desde el
+        cursor solo las filas de los `limit` jugadores de la página (y la
+        primera del siguiente, que marca dónde termina el último).
+
+        Returns:
+        tuple: (lista de Player, cursor siguiente o None si no hay más)
+        """
+        players = []
+        group = []
+        # Cursor que apunta a la fila que se está leyendo
+        position = cursor
+        with closing(self._iter_rows_from(cursor)) as rows:
+            for row, after in rows:
+                if group and row.get("player_id") != group[0].get("player_id"):
+                    players.append(self._rows_to_player(group))
+                    group = []
+                    if len(players) == limit:
+                        return players, position
+                group.append(row)
+                position = after
+        if group:
+            players.append(self._rows_to_player(group))
+        return players, None
+
+    def find_by(self, **filters) -> List[Player]:
+        """
+        Retorna los jugadores con alguna temporada que cumpla todos los filtros.
+
+        Los filtros son columnas indexadas (team_id, team_name, position,
+        season_year, age). En modo cacheado se resuelven con los índices
+        secundarios; si no, con una sola pasada sobre las filas. En ambos
+        casos solo se construyen los jugadores que coinciden.
+
+        Args:
+        **filters: Columna y valor exacto a buscar
+
+        Returns:
+        list[Player]: Jugadores encontrados, en orden de aparición
+        """
+        return self._players_for(self._matching_ids(filters))
+
+    def find_by_team(self, team_id, season_year: int = None) -> List[Player]:
+        """
+        Retorna los jugadores que jugaron en el equipo (por id o por nombre),
+        opcionalmente solo en la temporada indicada.
+        """
+        season = {} if season_year is None else {"season_year": season_year}
+        ids = self._matching_ids({"team_id": team_id, **season})
+        ids += [pid for pid in self._matching_ids({"team_name": team_id, **season}) if pid not in ids]
+        return self._players_for(ids)
+
+    def find_by_position(self, position, season_year: int = None) -> List[Player]:
+        """
+        Retorna los jugadores de una posición, opcionalmente solo los que
+        tienen temporada en el año indicado.
+        """
+        filters = {"position": position}
+        if season_year is not None:
+            filters["season_year"] = season_year
+        return self.find_by(**filters)
+
+    def views(self):
+        """
+        Retorna todos los jugadores como PlayerViews de solo lectura.
+
+        Las vistas leen el almacén columnar del archivo (ver
+        ColumnarSeasonStore), mapeado en memoria, así que no se construyen
+        objetos Player ni Season. El almacén se reconstruye cuando el CSV
+        cambió. Si hay escrituras que el CSV todavía no refleja (bitácora en
+        modo durable o lápidas en modo append), las vistas se arman sobre
+        las filas vigentes en memoria: leer no hace checkpoint ni compacta.
+
+        Returns:
+        PlayerViews: Secuencia de PlayerView, uno por jugador
+        """
+        # player_views importa este módulo
+        from .player_views import PlayerViews
+        with self._file_lock.shared(), self._lock:
+            pending = (self._wal is not None and (self._pending_ops or os.path.getsize(self._wal.filename))) or \
+                (self._append_only and os.path.exists(self.tombstone_file))
+            if pending:
+                rows = self._load()
+                return PlayerViews.from_dataframe(self._rows_frame(rows)) if rows else PlayerViews({})
+            store = ColumnarSeasonStore.for_source(self.filename)
+            if not store.is_fresh(self.filename):
+                # Un repositorio nuevo o vaciado no tiene cabecera y read_csv
+                # no acepta un archivo sin columnas
+                if not self._read_header():
+                    return PlayerViews({})
+                # Las columnas de texto se leen como texto (ids y contraseñas
+                # numéricas incluidas); las numéricas, con el tipo que infiera pandas
+                text = {column: str for column, column_type in SEASON_ROW_SCHEMA.items() if column_type is str}
+                df = pd.read_csv(self.filename, dtype=text)
+                if df.empty:
+                    return PlayerViews.from_dataframe(df)
+                store.write(df, source=self.filename)
+        return PlayerViews.from_store(store)
+
+    def _rows_frame(self, rows: List[Dict]) -> pd.DataFrame:
+        # Filas crudas del CSV -> DataFrame con los mismos tipos que read_csv
+        df = pd.DataFrame(rows).replace("", None)
+        for column in df.columns:
+            if SEASON_ROW_SCHEMA.get(column) is str:
+                continue
+            try:
+                df[column] = pd.to_numeric(df[column])
+            except (ValueError, TypeError):
+                pass
+        return df
+
+    def query(self, columns: List[str] = None, **filters) -> Iterator:
+        """
+        Busca por condiciones sobre las filas jugador-temporada.
+
+        Los filtros se evalúan sobre las filas crudas del CSV y solo se
+        construyen los jugadores que coinciden. Por ejemplo
+        query(goals__gt=20, season_year=2023) retorna los jugadores con más
+        de 20 goles en 2023. Operadores: eq, ne, gt, gte, lt, lte, in y
+        between.
+
+        Args:
+        columns (list, optional): Si se indica, en lugar de jugadores se
+            retornan dicts con esas columnas de cada temporada que coincide
+        **filters: Condiciones que debe cumplir una misma temporada
+
+        Returns:
+        Iterador perezoso de Player (o de dicts proyectados)
+        """
+        if columns is not None:
+            decoders = [(column, _converter(column)) for column in columns]
+            return (
+                {column: None if row.get(column) in ("", None) else decode(row.get(column)) for column, decode in decoders}
+                for row in self._query_rows(filters)
+            )
+        if self._cache is not None:
+            return self._iter_players(self._query_rows(filters))
+        return self._scan_players(filters)
+
+    def _iter_players(self, rows) -> Iterator[Player]:
+        # Con caché cada jugador sale apenas aparece su primera fila que
+        # coincide: el resto de sus filas se busca en el índice por id
+        seen = set()
+        for row in rows:
+            pid = row.get("player_id")
+            if pid in seen:
+                continue
+            seen.add(pid)
+            player_rows = list(self._cache.lookup(pid))
+            if player_rows:
+                yield self._rows_to_player(player_rows)
+
+    def _scan_players(self, filters: Dict) -> Iterator[Player]:
+        # Sin caché, una primera pasada junta solo los ids que coinciden y
+        # una segunda lee las filas de esos jugadores, que pueden no estar
+        # juntas (bulk_write_rows agrega al final). En memoria quedan solo
+        # las filas de los jugadores encontrados
+        predicate = compile_predicate(parse_filters(filters))
+        groups = {}
+        for row in self._iter_rows():
+            if predicate(row):
+                groups.setdefault(row.get("player_id"), [])
+        if not groups:
+            return
+        for row in self._iter_rows():
+            rows = groups.get(row.get("player_id"))
+            if rows is not None:
+                rows.append(row)
+        for rows in groups.values():
+            if rows:
+                yield self._rows_to_player(rows)
+
+    def _index_value(self, value) -> str:
+        # Los valores se comparan tal como quedan en el CSV
+        if isinstance(value, Position):
+            return value.value
+        return "" if value is None else str(value)
+
+    def _matching_ids(self, filters: Dict) -> List[str]:
+        unknown = set(filters) - set(self.indexed_fields)
+        if unknown:
+            raise ValueError(f"Columnas no indexadas: {', '.join(sorted(unknown))}")
+        filters = {k: self._index_value(v) for k, v in filters.items()}
+        if self._cache is not None and filters:
+            self._load()
+            candidates = min((self._cache.lookup_by(k, v) for k, v in filters.items()), key=len)
+        else:
+            candidates = self._load()
+        ids = {}
+        for row in candidates:
+            if all(row.get(k) == v for k, v in filters.items()):
+                ids.setdefault(row.get("player_id"), None)
+        return list(ids)
+
+    def _players_for(self, ids: List[str]) -> List[Player]:
+        if not ids:
+            return []
+        groups = self._rows_by_id(ids)
+        return [self._rows_to_player(rows) for rows in groups.values() if rows]
+
+    def find_many(self, ids) -> List[Player]:
+        ids = list(ids)
+        groups = self._rows_by_id(ids)
+        return [self._rows_to_player(groups[pid]) if groups[pid] else None for pid in ids]
+
+    @writes_file
+    def save_many(self, players) -> List[bool]:
+        players = list(players)
+        if self._wal is not None:
+            return self._durable_save_many(players, self._player_to_rows)
+        known = {row.get("player_id") for row in self._load()}
+        result = []
+        new_rows = []
+        for player in players:
+            if player is None or player.get_id() in known:
+                result.append(False)
+                continue
+            known.add(player.get_id())
+            new_rows.extend(self._player_to_rows(player))
+            result.append(True)
+        if self._append_only:
+            self._append_rows(new_rows)
+        elif new_rows:
+            self.bulk_write_rows(new_rows)
+        return result
+
+    @writes_file
+    def replace_many(self, players: Dict[str, Player]):
+        if self._wal is not None:
+            self._durable_apply([(id, self._player_to_rows(p), "upsert") for id, p in players.items()])
+            return
+        data = self._load()
+        new_rows = [row for player in players.values() for row in self._player_to_rows(player)]
+        existing = {row.get("player_id") for row in data}
+        if self._append_only:
+            targets = [id for id in players if id in existing]
+            if targets:
+                self._write_tombstones(targets)
+            self._append_rows(new_rows)
+        else:
+            data = [row for row in data if row.get("player_id") not in players]
+            data.extend(new_rows)
+            self._save(data)
+        for id, player in players.items():
+            record_change(id, UPDATE if id in existing else INSERT, player.serialize)
+
+    @writes_file
+    def delete_many(self, ids):
+        ids = set(ids)
+        if self._wal is not None:
+            self._durable_apply([(id, None, "upsert") for id in ids])
+            return
+        data = self._load()
+        if self._append_only:
+            existing = {row.get("player_id") for row in data}
+            targets = [id for id in ids if id in existing]
+            if targets:
+                self._write_tombstones(targets)
+                for id in targets:
+                    record_change(id, DELETE)
+            return
+        deleted = {row.get("player_id") for row in data} & ids
+        self._save([row for row in data if row.get("player_id") not in ids])
+        for id in deleted:
+            record_change(id, DELETE)
     
     def _player_to_rows(self, player: Player) -> List[Dict]:
         rows = []
-        for season in player.seasons:
+        position = player.get_position()
+        for season in player.get_seasons():
+            team = season._team
             row = {
                 "player_id": player.get_id(),
-                "player_name": player.name,
+                "player_name": player.get_name(),
                 "password": player._password,
-                "age": player.age,
-                "position": player.position.value if player.position else None,
-                "team_name": season.get_team(),
+                "age": player.get_age(),
+                "position": position.value if position else None,
+                "team_id": None,
+                "team_name": None,
                 "season_year": season.get_year(),
             }
             row.update(season._stats)
+            if team is None or isinstance(team, str):
+                # _team es el id del equipo (ver Season.get_team); el nombre,
+                # si se leyó del archivo, vuelve desde las estadísticas extra
+                row["team_id"] = team
+            else:
+                row["team_id"] = team.get_id()
+                row["team_name"] = team.get_name()
             rows.append(row)
         
         return rows
     
+    def _entity_row(self, rows: List[Dict]) -> Dict:
+        return self._rows_to_player(rows).serialize()
+
+    def _decoders_for(self, row: Dict):
+        # Todas las filas leídas del mismo archivo comparten cabecera, así que
+        # los pares (columna, conversor) se arman una vez por cabecera
+        header = tuple(row)
+        decoders = self._stat_decoders.get(header)
+        if decoders is None:
+            decoders = self._stat_decoders[header] = [
+                (column, _converter(column)) for column in header if column not in _NON_STAT_COLUMNS
+            ]
+        return decoders
+
     def _rows_to_player(self, rows: List[Dict]) -> Player:
         if not rows:
             return None
         
         first_row = rows[0]
-        player_id = first_row.get("player_id")
-        
-        seasons = []
-        for row in rows:
-            excluded_keys = {"player_id", "player_name", "password", "age", "position", "team_name", "season_year"}
-            stats = {k: v for k, v in row.items() if k not in excluded_keys and v != ''}
-            
-            for k, v in stats.items():
-                try:
-                    if '.' in str(v):
-                        stats[k] = float(v)
-                    else:
-                        stats[k] = int(v)
-                except (ValueError, TypeError):
-                    pass
-            
-            season = Season(
-                id=f"{player_id}_{row['season_year']}",
-                year=int(row["season_year"]),
-                team=row["team_name"],
-                stats=stats
-            )
-            seasons.append(season)
-        
         position_value = first_row.get("position")
-        return Player(
-            id=player_id,
+        return Player.from_storage(
+            id=first_row.get("player_id"),
             name=first_row["player_name"],
             password=first_row["password"],
             age=int(first_row["age"]),
             position=Position(position_value) if position_value else None,
-            seasons=seasons
-        )
\ No newline at end of file
+            seasons=self._rows_to_seasons(rows)
+        )
+
+    def _rows_to_seasons(self, rows: List[Dict]) -> List[Season]:
+        if not rows:
+            return []
+        player_id = rows[0].get("player_id")
+        decoders = self._decoders_for(rows[0])
+        seasons = []
+        for row in rows:
+            stats = _decode_stats(row, decoders)
+            year = int(row["season_year"])
+            # Filas viejas sin team_id guardaban el id en team_name
+            team = row.get("team_id") or row.get("team_name") or None
+            seasons.append(Season(id=f"{player_id}_{year}", year=year, team=team, stats=stats))
+        return seasons
\ No newline at end of file
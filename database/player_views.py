@@ -0,0 +1,233 @@
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from models import Position
+from models.player import STAT_FIELDS
+from .player_repository import _NON_STAT_COLUMNS, _INT_STAT_COLUMNS
+
+def _scalar(value):
+    # Escalar de numpy -> int/float de Python; NaN es un valor ausente
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+class PlayerViews:
+    """
+    Jugadores de solo lectura sobre columnas jugador-temporada.
+
+    Envuelve arreglos de numpy (por ejemplo los mapeados en memoria de un
+    ColumnarSeasonStore) o las columnas de un DataFrame sin copiarlos: cada
+    PlayerView y SeasonView es solo un rango o un índice de fila, y los
+    valores se leen al pedirlos. Las columnas de texto pueden venir
+    codificadas (códigos + categorías).
+
+    Las filas de un jugador no tienen que estar contiguas: si no lo están,
+    un argsort estable por orden de aparición las agrupa sin copiar las
+    columnas, conservando el orden de los jugadores y de sus temporadas.
+    """
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]] = None):
+        self._columns = columns
+        self._categories = categories or {}
+        self._rows = len(next(iter(columns.values()))) if columns else 0
+        self._stat_columns = [name for name in STAT_FIELDS if name in columns] + [
+            name for name in columns if name not in _NON_STAT_COLUMNS and name not in STAT_FIELDS
+        ]
+        self._starts = None
+        self._order = None
+        self._index = None
+
+    @classmethod
+    def from_store(cls, store, columns: List[str] = None) -> "PlayerViews":
+        """Vistas sobre un ColumnarSeasonStore, sin leer los arreglos a memoria."""
+        _, arrays, categories = store.snapshot(columns)
+        return cls(arrays, categories)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "PlayerViews":
+        """Vistas sobre las columnas de un DataFrame; las Categorical se leen por código."""
+        columns, categories = {}, {}
+        for name in df.columns:
+            series = df[name]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns[name] = series.cat.codes.to_numpy()
+                categories[name] = list(series.cat.categories)
+            else:
+                columns[name] = series.to_numpy()
+        return cls(columns, categories)
+
+    def _value(self, column: str, row: int):
+        values = self._columns.get(column)
+        if values is None:
+            return None
+        value = values[row if self._order is None else self._order[row]]
+        names = self._categories.get(column)
+        if names is not None:
+            return names[value] if value >= 0 else None
+        return _scalar(value)
+
+    def _slice(self, column: str, start: int, stop: int) -> List:
+        # Valores de Python de un rango de filas, convertidos en un solo paso
+        values = self._columns.get(column)
+        if values is None:
+            return [None] * (stop - start)
+        rows = slice(start, stop) if self._order is None else self._order[start:stop]
+        chunk = values[rows].tolist()
+        names = self._categories.get(column)
+        if names is not None:
+            return [names[code] if code >= 0 else None for code in chunk]
+        if values.dtype.kind == "f":
+            return [None if value != value else value for value in chunk]
+        return chunk
+
+    def _serialize_seasons(self, start: int, stop: int) -> List[Dict]:
+        player_id = self._value("player_id", start)
+        years = self._slice("season_year", start, stop)
+        teams = [
+            team_id or team_name
+            for team_id, team_name in zip(self._slice("team_id", start, stop), self._slice("team_name", start, stop))
+        ]
+        stats = [{} for _ in years]
+        for name in self._stat_columns:
+            is_int = name in _INT_STAT_COLUMNS
+            for season_stats, value in zip(stats, self._slice(name, start, stop)):
+                if value is None:
+                    continue
+                if is_int and isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                season_stats[name] = value
+        return [
+            {"_id": f"{player_id}_{year}", "_team": team, "_year": year, "_stats": season_stats}
+            for year, team, season_stats in zip(years, teams, stats)
+        ]
+
+    def _player_starts(self) -> np.ndarray:
+        # Primera posición de cada jugador, más el total al final. Las
+        # posiciones son filas, o índices de _order si hubo que agruparlas
+        if self._starts is None:
+            if not self._rows:
+                self._starts = np.array([0])
+                return self._starts
+            # Un código por jugador, en orden de primera aparición
+            codes = pd.factorize(np.asarray(self._columns["player_id"]))[0]
+            changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+            if len(changes) + 1 > codes.max() + 1:
+                self._order = np.argsort(codes, kind="stable")
+                codes = codes[self._order]
+                changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+            self._starts = np.concatenate(([0], changes, [self._rows]))
+        return self._starts
+
+    def __len__(self) -> int:
+        return len(self._player_starts()) - 1
+
+    def __getitem__(self, i: int) -> "PlayerView":
+        starts = self._player_starts()
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return PlayerView(self, int(starts[i]), int(starts[i + 1]))
+
+    def __iter__(self) -> Iterator["PlayerView"]:
+        starts = self._player_starts().tolist()
+        for start, stop in zip(starts, starts[1:]):
+            yield PlayerView(self, start, stop)
+
+    def find(self, player_id: str) -> Optional["PlayerView"]:
+        if self._index is None:
+            self._index = {player.get_id(): i for i, player in enumerate(self)}
+        i = self._index.get(player_id)
+        return None if i is None else self[i]
+
+
+class SeasonView:
+    """Temporada de solo lectura: una fila de PlayerViews, con los getters de Season."""
+    __slots__ = ("_views", "_row")
+
+    def __init__(self, views: PlayerViews, row: int):
+        self._views = views
+        self._row = row
+
+    def get_id(self):
+        return f"{self._views._value('player_id', self._row)}_{self.get_year()}"
+
+    def get_year(self):
+        return self._views._value("season_year", self._row)
+
+    def get_team(self):
+        # Sin resolver: el id del equipo, como el Season cargado del CSV
+        return self._views._value("team_id", self._row) or self._views._value("team_name", self._row)
+
+    def get_stat(self, stat_name: str):
+        if stat_name in _NON_STAT_COLUMNS:
+            return None
+        value = self._views._value(stat_name, self._row)
+        if stat_name in _INT_STAT_COLUMNS and isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    def serialize(self) -> Dict:
+        return self._views._serialize_seasons(self._row, self._row + 1)[0]
+
+
+class PlayerView:
+    """Jugador de solo lectura: un rango de filas de PlayerViews, con los getters de Player."""
+    __slots__ = ("_views", "_start", "_stop")
+
+    def __init__(self, views: PlayerViews, start: int, stop: int):
+        self._views = views
+        self._start = start
+        self._stop = stop
+
+    def get_id(self):
+        return self._views._value("player_id", self._start)
+
+    def get_name(self):
+        return self._views._value("player_name", self._start)
+
+    def get_age(self):
+        return self._views._value("age", self._start)
+
+    def get_position(self) -> Position:
+        position = self._views._value("position", self._start)
+        return Position(position) if position else None
+
+    def get_seasons(self) -> List[SeasonView]:
+        return [SeasonView(self._views, row) for row in range(self._start, self._stop)]
+
+    def get_season(self, num: int):
+        if num <= 0 or self._stop - self._start < num:
+            return None
+        return SeasonView(self._views, self._start + num - 1)
+
+    def get_latest_season(self) -> SeasonView:
+        return SeasonView(self._views, self._stop - 1)
+
+    def get_stat(self, stat_name: str, season_year: int = None):
+        """
+        Estadística de la última temporada, o de `season_year` si se indica.
+
+        Returns:
+        El valor, o None si no existe
+        """
+        if season_year is None:
+            return self.get_latest_season().get_stat(stat_name)
+        for season in self.get_seasons():
+            if season.get_year() == season_year:
+                return season.get_stat(stat_name)
+        return None
+
+    def serialize(self) -> Dict:
+        """Mismo diccionario que Player.serialize() para los datos guardados."""
+        position = self.get_position()
+        # Un almacén armado con pandas sin tipos puede traerla como número
+        password = self._views._value("password", self._start)
+        return {
+            "_id": self.get_id(),
+            "_name": self.get_name(),
+            "_age": self.get_age(),
+            "_password": None if password is None else str(password),
+            "_position": position.value if position else None,
+            "_seasons": self._views._serialize_seasons(self._start, self._stop),
+        }
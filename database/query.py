@@ -0,0 +1,91 @@
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Sufijos admitidos en los filtros de query(): columna__operador=valor
+OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "ne": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "in": lambda a, b: a in b,
+    "between": lambda a, b: b[0] <= a <= b[1],
+}
+
+Condition = Tuple[str, str, object]
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _normalize(value):
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def _operands(op: str, value) -> List:
+    return list(value) if op in ("in", "between") else [value]
+
+def parse_filters(filters: Dict) -> List[Condition]:
+    """
+    Convierte filtros estilo `goals__gt=20` en tuplas (columna, operador, valor).
+
+    Sin sufijo el operador es igualdad. `in` recibe una colección de valores
+    y `between` un par (mínimo, máximo), ambos incluidos.
+    """
+    conditions = []
+    for key, value in filters.items():
+        column, _, op = key.rpartition("__")
+        if not column or op not in OPERATORS:
+            column, op = key, "eq"
+        if op == "between" and len(value) != 2:
+            raise ValueError(f"{key} espera un par (mínimo, máximo)")
+        operands = [_normalize(v) for v in _operands(op, value)]
+        if op == "in":
+            value = frozenset(operands)
+        elif op == "between":
+            value = tuple(operands)
+        else:
+            value = operands[0]
+        conditions.append((column, op, value))
+    return conditions
+
+def _compile(column: str, op: str, value) -> Callable[[Dict], bool]:
+    compare = OPERATORS[op]
+    operands = list(value) if op in ("in", "between") else [value]
+    if operands and all(_is_number(v) for v in operands):
+        # Comparación numérica: solo se convierte el valor de esta columna
+        if op == "in":
+            value = frozenset(float(v) for v in operands)
+        def predicate(row):
+            raw = row.get(column)
+            if raw is None or raw == "":
+                return False
+            try:
+                return compare(float(raw), value)
+            except (TypeError, ValueError):
+                return False
+        return predicate
+    # Comparación como texto, igual que se guarda en el archivo
+    to_text = lambda v: "" if v is None else str(v)
+    if op == "in":
+        value = frozenset(to_text(v) for v in operands)
+    elif op == "between":
+        value = tuple(to_text(v) for v in operands)
+    else:
+        value = to_text(value)
+    return lambda row: compare(to_text(_normalize(row.get(column))), value)
+
+def compile_predicate(conditions: Iterable[Condition]) -> Callable[[Dict], bool]:
+    """Combina las condiciones en una sola función fila -> bool (todas deben cumplirse)."""
+    predicates = [_compile(*condition) for condition in conditions]
+    if not predicates:
+        return lambda row: True
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda row: all(predicate(row) for predicate in predicates)
+
+def project(rows: Iterable[Dict], columns: Iterable[str]) -> Iterator[Dict]:
+    columns = list(columns)
+    for row in rows:
+        yield {column: row.get(column) for column in columns}
@@ -1,6 +1,28 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+from .query import parse_filters, compile_predicate
+from .change_events import change_events, publishes
+import threading
+import time
+
+# Métodos de escritura que publican eventos de cambio
+WRITE_OPERATIONS = ("save", "replace", "delete", "save_many", "replace_many", "delete_many", "bulk_write_rows",
+                    "bulk_write_frames")
 
 class Repository(ABC):
+    # Bus donde se publican los cambios (ChangeEvent) de save, replace,
+    # delete, sus versiones por lote y las escrituras masivas. None lo desactiva.
+    events = change_events
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Cada implementación de un método de escritura publica sus cambios
+        for name in WRITE_OPERATIONS:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, "__isabstractmethod__", False) and not getattr(method, "_publishes", False):
+                setattr(cls, name, publishes(name, method))
+
     @abstractmethod
     def find(self, id):
         pass
@@ -25,15 +47,191 @@ class Repository(ABC):
     def bulk_write_rows(self, row_iterable, chunk_size: int = 10000):
         pass
 
+    def bulk_write_frames(self, frames, chunk_size: int = 10000):
+        """
+        Escribe bloques columnares (DataFrames con las columnas de
+        bulk_write_rows). Esta versión pasa cada bloque a filas;
+        CSVRepository los escribe directamente.
+
+        Returns:
+        dict: El reporte de bulk_write_rows
+        """
+        rows = (row for frame in frames for row in frame.to_dict("records"))
+        return self.bulk_write_rows(rows, chunk_size)
+
+    # Operaciones por lote. Estas versiones delegan en las operaciones
+    # individuales; los repositorios de archivo las sobrescriben para
+    # resolver todo el lote con una sola lectura/escritura.
+    def find_many(self, ids):
+        """Retorna los elementos de cada id, en el mismo orden (None si no existe)."""
+        return [self.find(id) for id in ids]
+
+    def save_many(self, elements):
+        """Guarda varios elementos; retorna si cada uno se guardó."""
+        return [self.save(element) for element in elements]
+
+    def replace_many(self, elements):
+        """Reemplaza varios elementos a partir de un dict id -> elemento."""
+        for id, element in elements.items():
+            self.replace(id, element)
+
+    def delete_many(self, ids):
+        for id in ids:
+            self.delete(id)
+
+    def warm_up(self):
+        """Carga por adelantado cachés e índices, si el repositorio los usa."""
+        pass
+
+    def page(self, cursor=None, limit: int = 50):
+        """
+        Retorna una página de elementos y el cursor de la siguiente (None al
+        final). Esta versión recorta findAll; los repositorios de archivo
+        leen solo lo que ocupa la página.
+        """
+        elements = self.findAll()
+        start = int(cursor or 0)
+        end = start + limit
+        return elements[start:end], (str(end) if end < len(elements) else None)
+
+    def iter_all(self, batch_size: int = 1000):
+        """Itera todos los elementos pidiendo páginas de `batch_size`."""
+        cursor = None
+        while True:
+            items, cursor = self.page(cursor, batch_size)
+            yield from items
+            if cursor is None:
+                return
+
+    def query(self, columns=None, **filters):
+        """
+        Itera perezosamente los elementos que cumplen los filtros.
+
+        Los filtros usan la forma columna__operador=valor (eq, ne, gt, gte,
+        lt, lte, in, between); sin operador es igualdad. Esta versión filtra
+        sobre element.serialize(); los repositorios de archivo evalúan los
+        filtros sobre las filas crudas antes de construir objetos.
+
+        Args:
+        columns (list, optional): Si se indica, se retornan dicts solo con
+            esas columnas en lugar de objetos
+        **filters: Condiciones que deben cumplirse todas
+
+        Returns:
+        Iterador de elementos (o dicts proyectados)
+        """
+        predicate = compile_predicate(parse_filters(filters))
+        return self._filter_serialized(predicate, columns)
+
+    def _filter_serialized(self, predicate, columns):
+        for element in self.findAll():
+            data = element.serialize()
+            if predicate(data):
+                yield {column: data.get(column) for column in columns} if columns is not None else element
+
+def bulk_write_report(rows_written: int, bytes_written: int, start_time: float) -> dict:
+    """Resumen común que devuelven las implementaciones de bulk_write_rows."""
+    duration = time.time() - start_time
+    return {
+        "rows_written": rows_written,
+        "bytes_written": bytes_written,
+        "duration_s": round(duration, 2),
+        "rows_per_s": round(rows_written / duration, 1) if duration > 0 else float(rows_written),
+    }
+
 class RepositoryProvider():
+    """
+    Registro de repositorios por nombre de entidad ("Player", "Team", ...).
+
+    Un repositorio se puede registrar ya construido (los repositorios lo
+    hacen solos al crearse) o mediante una fábrica con register_factory: en
+    ese caso se construye en el primer get y se reutiliza la misma
+    instancia en todo el proceso, o una por hilo si se pide `per_thread`.
+    """
     _repositories = {}
+    _factories = {}
+    _lock = threading.RLock()
+    _local = threading.local()
 
     @classmethod
     def register(cls, name: str, repo):
+        if name in cls._building():
+            # La construcción la inició get(); el resultado lo guarda él
+            return
         cls._repositories[name] = repo
 
+    @classmethod
+    def register_factory(cls, name: str, factory: Callable[[], Repository], per_thread: bool = False):
+        """
+        Registra cómo construir un repositorio sin construirlo todavía.
+
+        Args:
+        name (str): Nombre de la entidad
+        factory (callable): Función sin argumentos que crea el repositorio
+        per_thread (bool): Una instancia por hilo en lugar de una por proceso
+        """
+        with cls._lock:
+            cls._factories[name] = (factory, per_thread)
+            cls._repositories.pop(name, None)
+
+    @classmethod
+    def _building(cls) -> set:
+        building = getattr(cls._local, "building", None)
+        if building is None:
+            building = cls._local.building = set()
+        return building
+
+    @classmethod
+    def _build(cls, name: str, factory: Callable[[], Repository]) -> Repository:
+        building = cls._building()
+        building.add(name)
+        try:
+            return factory()
+        finally:
+            building.discard(name)
+
     @classmethod
     def get(cls, name) -> Repository:
-        if not name in cls._repositories.keys():
+        repo = cls._repositories.get(name)
+        if repo is not None:
+            return repo
+        entry = cls._factories.get(name)
+        if entry is None:
             return None
-        return cls._repositories[name]
\ No newline at end of file
+        factory, per_thread = entry
+        if per_thread:
+            local = getattr(cls._local, "repositories", None)
+            if local is None:
+                local = cls._local.repositories = {}
+            if name not in local:
+                local[name] = cls._build(name, factory)
+            return local[name]
+        with cls._lock:
+            repo = cls._repositories.get(name)
+            if repo is None:
+                repo = cls._repositories[name] = cls._build(name, factory)
+            return repo
+
+    @classmethod
+    def warm_up(cls, names: Iterable[str] = None, workers: int = 4) -> Dict[str, float]:
+        """
+        Construye los repositorios indicados (todos los registrados si no se
+        indican) y precarga sus cachés e índices en paralelo. Los
+        repositorios por hilo no se precargan.
+
+        Returns:
+        dict: Segundos que tardó cada repositorio
+        """
+        if names is None:
+            names = set(cls._repositories) | set(cls._factories)
+        names = [name for name in names if not cls._factories.get(name, (None, False))[1]]
+
+        def warm(name):
+            start = time.time()
+            repo = cls.get(name)
+            if repo is not None:
+                repo.warm_up()
+            return name, round(time.time() - start, 3)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return dict(executor.map(warm, names))
@@ -0,0 +1,76 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+
+class RowCache:
+    """
+    Cache en memoria de las filas de un archivo de repositorio.
+
+    Guarda las filas ya parseadas junto con un índice por id y la firma
+    (mtime, tamaño) de los archivos en el momento de la lectura. Mientras la
+    firma no cambie, las lecturas se sirven desde memoria sin tocar disco.
+
+    Opcionalmente mantiene índices secundarios (campo -> valor -> filas)
+    para las columnas de `indexed`.
+    """
+    def __init__(self, filename: str, key: str, extra_files: Iterable[str] = (), indexed: Iterable[str] = ()):
+        self.filename = filename
+        self.key = key
+        self.files = [filename, *extra_files]
+        self.indexed = tuple(indexed)
+        self._signature: Optional[Tuple] = None
+        self._rows: List[Dict] = []
+        self._index: Dict[str, List[Dict]] = {}
+        self._secondary: Dict[str, Dict[str, List[Dict]]] = {field: {} for field in self.indexed}
+
+    def signature(self) -> Tuple:
+        stats = []
+        for filename in self.files:
+            try:
+                st = os.stat(filename)
+            except FileNotFoundError:
+                stats.append(None)
+                continue
+            stats.append((st.st_mtime_ns, st.st_size))
+        return tuple(stats)
+
+    def is_fresh(self) -> bool:
+        return self._signature is not None and self._signature == self.signature()
+
+    def store(self, rows: List[Dict], signature: Optional[Tuple]):
+        self._rows = []
+        self._index = {}
+        self._secondary = {field: {} for field in self.indexed}
+        self.append(rows, signature)
+
+    def append(self, rows: List[Dict], signature: Optional[Tuple]):
+        for row in rows:
+            self._rows.append(row)
+            self._index.setdefault(row.get(self.key), []).append(row)
+            for field, values in self._secondary.items():
+                values.setdefault(row.get(field), []).append(row)
+        self._signature = signature
+
+    def discard(self, id, signature: Optional[Tuple]):
+        removed = self._index.pop(id, None)
+        if removed is not None:
+            self._rows = [row for row in self._rows if row.get(self.key) != id]
+            for field, values in self._secondary.items():
+                for value in {row.get(field) for row in removed}:
+                    remaining = [row for row in values.get(value, []) if row.get(self.key) != id]
+                    if remaining:
+                        values[value] = remaining
+                    else:
+                        values.pop(value, None)
+        self._signature = signature
+
+    def rows(self) -> List[Dict]:
+        return self._rows
+
+    def lookup(self, id) -> List[Dict]:
+        return self._index.get(id, [])
+
+    def lookup_by(self, field: str, value) -> List[Dict]:
+        return self._secondary[field].get(value, [])
+
+    def invalidate(self):
+        self._signature = None
@@ -0,0 +1,208 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List
+from .repository import Repository, RepositoryProvider, bulk_write_report
+from .player_repository import PlayerRepository
+from .change_events import carry_changes
+from .query import parse_filters
+from models import Player
+import itertools
+import os
+import time
+import zlib
+
+class ShardedPlayerRepository(Repository):
+    """
+    PlayerRepository particionado en `shards` archivos CSV por hash del
+    player_id (data/players-shard-03-of-16.csv, ...).
+
+    Las búsquedas por id, altas, reemplazos y bajas solo leen y reescriben
+    el shard del jugador. findAll, find_by y bulk_write_rows reparten el
+    trabajo entre los shards en un pool de hilos. Cada shard es un
+    PlayerRepository normal, así que admite los mismos modos (cacheado,
+    append, durable) y tiene sus propios locks.
+
+    El hash es estable entre procesos (crc32); cambiar el número de shards
+    requiere volver a cargar los datos.
+    """
+    indexed_fields = PlayerRepository.indexed_fields
+    cls = Player
+    _id_field = "player_id"
+
+    def __init__(self, shards: int = 8, cached: bool = False, append_only: bool = False, compact_every: int = 1000,
+                 durable: bool = False, checkpoint_every: int = 1000, workers: int = None, compression: str = None):
+        if shards < 1:
+            raise ValueError("El número de shards debe ser al menos 1")
+        folder = "data"
+        os.makedirs(folder, exist_ok=True)
+        self.shards = [
+            PlayerRepository(cached=cached, append_only=append_only, compact_every=compact_every,
+                             durable=durable, checkpoint_every=checkpoint_every, compression=compression,
+                             filename=os.path.join(folder, f"players-shard-{i:02d}-of-{shards:02d}.csv"))
+            for i in range(shards)
+        ]
+        # Los eventos de cambio los publica este repositorio, no cada shard
+        for shard in self.shards:
+            shard.events = None
+        self._workers = workers or min(shards, 8)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="player-shard")
+        # Cada shard se registra como "Player" al crearse; el repositorio
+        # visible para los servicios es este
+        RepositoryProvider.register("Player", self)
+
+    def shard_index(self, player_id) -> int:
+        return zlib.crc32(str(player_id).encode("utf-8")) % len(self.shards)
+
+    def shard_for(self, player_id) -> PlayerRepository:
+        return self.shards[self.shard_index(player_id)]
+
+    def map_shards(self, fn: Callable[[PlayerRepository], object]) -> List:
+        """Ejecuta fn sobre cada shard en paralelo; retorna los resultados en orden de shard."""
+        if len(self.shards) == 1:
+            return [fn(self.shards[0])]
+        return list(self._executor.map(fn, self.shards))
+
+    def _group(self, ids) -> Dict[int, List]:
+        groups = {}
+        for id in ids:
+            groups.setdefault(self.shard_index(id), []).append(id)
+        return groups
+
+    def _fan_out(self, groups: Dict[int, object], fn: Callable[[PlayerRepository, object], object]) -> Dict[int, object]:
+        # Solo se tocan los shards con trabajo. Los cambios que anotan los
+        # shards en el pool son de la escritura en curso de este hilo
+        fn = carry_changes(fn)
+        futures = {i: self._executor.submit(fn, self.shards[i], part) for i, part in groups.items()}
+        return {i: future.result() for i, future in futures.items()}
+
+    def find(self, player_id: str) -> Player:
+        return self.shard_for(player_id).find(player_id)
+
+    def findAll(self) -> List[Player]:
+        return [player for players in self.map_shards(lambda shard: shard.findAll()) for player in players]
+
+    def find_by(self, **filters) -> List[Player]:
+        return [player for players in self.map_shards(lambda shard: shard.find_by(**filters)) for player in players]
+
+    def find_by_team(self, team_id, season_year: int = None) -> List[Player]:
+        return [player for players in self.map_shards(lambda shard: shard.find_by_team(team_id, season_year)) for player in players]
+
+    def find_by_position(self, position, season_year: int = None) -> List[Player]:
+        return [player for players in self.map_shards(lambda shard: shard.find_by_position(position, season_year)) for player in players]
+
+    def page(self, cursor: str = None, limit: int = 50):
+        """
+        Página de jugadores recorriendo los shards en orden. El cursor es
+        "<shard>|<cursor del shard>".
+        """
+        shard, _, inner = cursor.partition("|") if cursor else ("0", "", "")
+        shard = int(shard)
+        inner = inner or None
+        players = []
+        while shard < len(self.shards):
+            items, inner = self.shards[shard].page(inner, limit - len(players))
+            players.extend(items)
+            if inner is None:
+                shard += 1
+            if len(players) == limit:
+                break
+        if shard >= len(self.shards):
+            return players, None
+        return players, f"{shard}|{inner or ''}"
+
+    def query(self, columns: List[str] = None, **filters) -> Iterator:
+        """Igual que PlayerRepository.query, recorriendo los shards uno tras otro."""
+        parse_filters(filters)
+        return itertools.chain.from_iterable(shard.query(columns, **filters) for shard in self.shards)
+
+    def save(self, player: Player) -> bool:
+        if player is None:
+            return False
+        return self.shard_for(player.get_id()).save(player)
+
+    def replace(self, id: str, player: Player):
+        self.shard_for(id).replace(id, player)
+
+    def delete(self, id: str):
+        self.shard_for(id).delete(id)
+
+    def find_many(self, ids) -> List[Player]:
+        ids = list(ids)
+        results = self._fan_out(self._group(ids), lambda shard, part: dict(zip(part, shard.find_many(part))))
+        found = {}
+        for part in results.values():
+            found.update(part)
+        return [found[id] for id in ids]
+
+    def save_many(self, players) -> List[bool]:
+        players = list(players)
+        groups = {}
+        for position, player in enumerate(players):
+            if player is not None:
+                groups.setdefault(self.shard_index(player.get_id()), []).append((position, player))
+        result = [False] * len(players)
+        saved = self._fan_out(groups, lambda shard, part: shard.save_many([player for _, player in part]))
+        for i, part in groups.items():
+            for (position, _), ok in zip(part, saved[i]):
+                result[position] = ok
+        return result
+
+    def replace_many(self, players: Dict[str, Player]):
+        groups = {}
+        for id, player in players.items():
+            groups.setdefault(self.shard_index(id), {})[id] = player
+        self._fan_out(groups, lambda shard, part: shard.replace_many(part))
+
+    def delete_many(self, ids):
+        self._fan_out(self._group(set(ids)), lambda shard, part: shard.delete_many(part))
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        """
+        Reparte las filas por shard y las escribe en bloques.
+
+        Cada shard acumula hasta `chunk_size` filas antes de enviarlas al
+        pool y tiene como mucho un bloque escribiéndose, así que las filas
+        de cada shard quedan en el orden recibido y en memoria hay como
+        mucho dos bloques por shard.
+
+        Returns:
+        dict: Filas y bytes escritos, duración y filas por segundo
+        """
+        start_time = time.time()
+        write = [carry_changes(shard.bulk_write_rows) for shard in self.shards]
+        buffers = [[] for _ in self.shards]
+        inflight = {}
+        reports = []
+        for row in row_iterable:
+            i = self.shard_index(row["player_id"])
+            buffers[i].append(row)
+            if len(buffers[i]) >= chunk_size:
+                # Un solo bloque en curso por shard: mantiene el orden de las
+                # filas dentro del shard y acota la memoria usada
+                if i in inflight:
+                    reports.append(inflight.pop(i).result())
+                inflight[i] = self._executor.submit(write[i], buffers[i], chunk_size)
+                buffers[i] = []
+        for i, buf in enumerate(buffers):
+            if buf:
+                if i in inflight:
+                    reports.append(inflight.pop(i).result())
+                inflight[i] = self._executor.submit(write[i], buf, chunk_size)
+        reports += [future.result() for future in inflight.values()]
+        return bulk_write_report(
+            sum(r["rows_written"] for r in reports),
+            sum(r["bytes_written"] for r in reports),
+            start_time
+        )
+
+    def warm_up(self):
+        self.map_shards(lambda shard: shard.warm_up())
+
+    def compact(self):
+        self.map_shards(lambda shard: shard.compact())
+
+    def checkpoint(self):
+        self.map_shards(lambda shard: shard.checkpoint())
+
+    def close(self):
+        self.map_shards(lambda shard: shard.close())
+        self._executor.shutdown()
@@ -0,0 +1,372 @@
+from typing import Dict, Iterable, List
+from .repository import Repository, RepositoryProvider, bulk_write_report
+from .change_events import INSERT, UPDATE, DELETE, recording, record_change
+from models import Serializable, Player, Season, Position
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class SQLiteRepository(Repository):
+    """
+    Repositorio sobre SQLite (modo WAL).
+
+    Cada entidad se guarda serializada en la columna `data` de su tabla,
+    junto con copias indexadas de los campos por los que se consulta
+    (id, equipo y posición). Las escrituras son transaccionales y no
+    reescriben el resto de registros.
+    """
+    _id_field = "_id"
+
+    def __init__(self, cls: Serializable, path: str = os.path.join("data", "soccer.db")):
+        self.cls = cls
+        self.path = path
+        self.table = f"{cls.__name__.lower()}s"
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # sqlite3 no permite compartir una conexión entre hilos
+        self._local = threading.local()
+        with self._connection() as conn:
+            self._create_schema(conn)
+        RepositoryProvider.register(cls.__name__.capitalize(), self)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        t = self.table
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {t} (id TEXT PRIMARY KEY, team TEXT, position TEXT, data TEXT NOT NULL)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{t}_team ON {t}(team)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{t}_position ON {t}(position)")
+
+    def _to_record(self, data: Dict):
+        team = data.get("_team", data.get("team"))
+        id = data.get("_id")
+        return (
+            str(id) if id is not None else None,
+            str(team) if team is not None else None,
+            data.get("_position"),
+            json.dumps(data, ensure_ascii=False),
+        )
+
+    def _existing_ids(self, conn: sqlite3.Connection, table: str, ids) -> set:
+        # Ids del lote que ya están en la tabla; se consulta dentro de la
+        # transacción que escribe, así no cambian antes de escribir
+        ids = list(dict.fromkeys(ids))
+        found = set()
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(part))
+            found.update(row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", part))
+        return found
+
+    def _db_size(self) -> int:
+        return sum(os.path.getsize(f) for f in (self.path, f"{self.path}-wal") if os.path.exists(f))
+
+    def find(self, id):
+        row = self._connection().execute(f"SELECT data FROM {self.table} WHERE id = ?", (str(id),)).fetchone()
+        return self.cls.deserialize(json.loads(row[0])) if row else None
+
+    def findAll(self):
+        rows = self._connection().execute(f"SELECT data FROM {self.table} ORDER BY rowid").fetchall()
+        return [self.cls.deserialize(json.loads(data)) for (data,) in rows]
+
+    def page(self, cursor: str = None, limit: int = 50):
+        """Página por rowid: cada página es una consulta indexada desde el cursor."""
+        rows = self._connection().execute(
+            f"SELECT rowid, data FROM {self.table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (int(cursor or 0), limit + 1)
+        ).fetchall()
+        items = [self.cls.deserialize(json.loads(data)) for _, data in rows[:limit]]
+        return items, (str(rows[limit - 1][0]) if len(rows) > limit else None)
+
+    def find_by_team(self, team_id):
+        rows = self._connection().execute(f"SELECT data FROM {self.table} WHERE team = ? ORDER BY rowid", (str(team_id),)).fetchall()
+        return [self.cls.deserialize(json.loads(data)) for (data,) in rows]
+
+    def find_by_position(self, position):
+        position = position.value if isinstance(position, Position) else position
+        rows = self._connection().execute(f"SELECT data FROM {self.table} WHERE position = ? ORDER BY rowid", (position,)).fetchall()
+        return [self.cls.deserialize(json.loads(data)) for (data,) in rows]
+
+    def save(self, element):
+        if element is None:
+            return False
+        with self._connection() as conn:
+            cur = conn.execute(f"INSERT OR IGNORE INTO {self.table} VALUES (?, ?, ?, ?)", self._to_record(element.serialize()))
+        return cur.rowcount == 1
+
+    def delete(self, id):
+        with self._connection() as conn:
+            cur = conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (str(id),))
+        if cur.rowcount:
+            record_change(id, DELETE)
+
+    def replace(self, id, element):
+        row = element.serialize()
+        _, team, position, data = self._to_record(row)
+        with self._connection() as conn:
+            cur = conn.execute(f"UPDATE {self.table} SET team = ?, position = ?, data = ? WHERE id = ?", (team, position, data, str(id)))
+        if cur.rowcount:
+            record_change(id, UPDATE, row)
+
+    def _write_records(self, conn: sqlite3.Connection, records: List, rows: List[Dict] = None):
+        # Con `rows` (eventos de cambio) se anota cada fila como alta o
+        # modificación según lo que había en la tabla
+        with conn:
+            if rows is not None:
+                conn.execute("BEGIN IMMEDIATE")
+                existing = self._existing_ids(conn, self.table, [record[0] for record in records])
+            conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)", records)
+        if rows is not None:
+            for record, row in zip(records, rows):
+                record_change(row.get(self._id_field), UPDATE if record[0] in existing else INSERT, row)
+                existing.add(record[0])
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        start_time = time.time()
+        start_size = self._db_size()
+        count = 0
+        conn = self._connection()
+        rows = [] if recording() else None
+        buf = []
+        for row in row_iterable:
+            buf.append(self._to_record(row))
+            if rows is not None:
+                rows.append(row)
+            if len(buf) >= chunk_size:
+                self._write_records(conn, buf, rows)
+                count += len(buf)
+                buf = []
+                rows = [] if rows is not None else None
+        if buf:
+            self._write_records(conn, buf, rows)
+            count += len(buf)
+        return bulk_write_report(count, self._db_size() - start_size, start_time)
+
+
+class SQLitePlayerRepository(SQLiteRepository):
+    """
+    Variante de SQLiteRepository para jugadores.
+
+    Los datos del jugador se guardan una sola vez en `players` y cada
+    temporada en la tabla hija `seasons`, indexada por jugador, equipo y
+    año. Acepta en bulk_write_rows las mismas filas jugador-temporada que
+    PlayerRepository.
+    """
+    _id_field = "player_id"
+    _player_keys = ("player_id", "player_name", "password", "age", "position")
+    _season_keys = ("team_id", "team_name", "season_year")
+    indexed_fields = ("team_id", "team_name", "position", "season_year", "age")
+
+    def __init__(self, path: str = os.path.join("data", "soccer.db")):
+        super().__init__(Player, path)
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS players (id TEXT PRIMARY KEY, name TEXT, password TEXT, age INTEGER, position TEXT)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_players_position ON players(position)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS seasons ("
+            "player_id TEXT NOT NULL REFERENCES players(id) ON DELETE CASCADE, "
+            "season_year INTEGER NOT NULL, team_id TEXT, team_name TEXT, stats TEXT NOT NULL, "
+            "PRIMARY KEY (player_id, season_year))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seasons_team_id ON seasons(team_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seasons_team_name ON seasons(team_name)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seasons_year ON seasons(season_year)")
+
+    def _player_record(self, player: Player):
+        position = player.get_position()
+        return (str(player.get_id()), player.get_name(), player._password, player.get_age(), position.value if position else None)
+
+    def _season_records(self, player: Player):
+        records = []
+        for season in player.get_seasons():
+            team = season._team
+            stats = season._stats
+            team_name = stats.pop("team_name", None)
+            if team is None or isinstance(team, str):
+                # _team es el id del equipo (ver Season.get_team)
+                team_id = team
+            else:
+                team_id, team_name = team.get_id(), team.get_name()
+            records.append((str(player.get_id()), season.get_year(), team_id, team_name, json.dumps(stats)))
+        return records
+
+    def _to_players(self, player_rows, season_rows) -> List[Player]:
+        seasons_by_player = {}
+        for player_id, year, team_id, team_name, stats in season_rows:
+            # Como en PlayerRepository: el equipo por id y el nombre entre las estadísticas
+            stats = json.loads(stats)
+            if team_name is not None:
+                stats["team_name"] = team_name
+            season = Season(id=f"{player_id}_{year}", year=year, team=team_id or team_name, stats=stats)
+            seasons_by_player.setdefault(player_id, []).append(season)
+        return [
+            Player.from_storage(
+                id=player_id,
+                name=name,
+                password=password,
+                age=age,
+                position=Position(position) if position else None,
+                seasons=seasons_by_player.get(player_id, []),
+            )
+            for player_id, name, password, age, position in player_rows
+        ]
+
+    def _select(self, where: str = "", params=()) -> List[Player]:
+        conn = self._connection()
+        player_rows = conn.execute(f"SELECT id, name, password, age, position FROM players {where} ORDER BY rowid", params).fetchall()
+        if not player_rows:
+            return []
+        if where:
+            season_rows = conn.execute(
+                f"SELECT player_id, season_year, team_id, team_name, stats FROM seasons "
+                f"WHERE player_id IN (SELECT id FROM players {where}) ORDER BY player_id, season_year", params
+            ).fetchall()
+        else:
+            season_rows = conn.execute("SELECT player_id, season_year, team_id, team_name, stats FROM seasons ORDER BY player_id, season_year").fetchall()
+        return self._to_players(player_rows, season_rows)
+
+    def page(self, cursor: str = None, limit: int = 50):
+        conn = self._connection()
+        player_rows = conn.execute(
+            "SELECT rowid, id, name, password, age, position FROM players WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (int(cursor or 0), limit + 1)
+        ).fetchall()
+        more = len(player_rows) > limit
+        player_rows = player_rows[:limit]
+        if not player_rows:
+            return [], None
+        ids = [row[1] for row in player_rows]
+        season_rows = conn.execute(
+            f"SELECT player_id, season_year, team_id, team_name, stats FROM seasons "
+            f"WHERE player_id IN ({', '.join('?' for _ in ids)}) ORDER BY player_id, season_year", ids
+        ).fetchall()
+        players = self._to_players([row[1:] for row in player_rows], season_rows)
+        return players, (str(player_rows[-1][0]) if more else None)
+
+    def find(self, id):
+        players = self._select("WHERE id = ?", (str(id),))
+        return players[0] if players else None
+
+    def findAll(self):
+        return self._select()
+
+    def find_by(self, **filters):
+        unknown = set(filters) - set(self.indexed_fields)
+        if unknown:
+            raise ValueError(f"Columnas no indexadas: {', '.join(sorted(unknown))}")
+        clauses, params = [], []
+        for column in ("position", "age"):
+            if column in filters:
+                value = filters[column]
+                clauses.append(f"{column} = ?")
+                params.append(value.value if isinstance(value, Position) else value)
+        season_filters = [column for column in self._season_keys if column in filters]
+        if season_filters:
+            conditions = " AND ".join(f"{column} = ?" for column in season_filters)
+            clauses.append(f"id IN (SELECT player_id FROM seasons WHERE {conditions})")
+            params += [int(filters[c]) if c == "season_year" else str(filters[c]) for c in season_filters]
+        return self._select(f"WHERE {' AND '.join(clauses)}" if clauses else "", tuple(params))
+
+    def find_by_team(self, team_id, season_year: int = None):
+        if season_year is None:
+            return self._select(
+                "WHERE id IN (SELECT player_id FROM seasons WHERE team_id = ? OR team_name = ?)", (str(team_id), str(team_id))
+            )
+        return self._select(
+            "WHERE id IN (SELECT player_id FROM seasons WHERE (team_id = ? OR team_name = ?) AND season_year = ?)",
+            (str(team_id), str(team_id), int(season_year))
+        )
+
+    def find_by_position(self, position, season_year: int = None):
+        position = position.value if isinstance(position, Position) else position
+        if season_year is None:
+            return self._select("WHERE position = ?", (position,))
+        return self._select(
+            "WHERE position = ? AND id IN (SELECT player_id FROM seasons WHERE season_year = ?)", (position, int(season_year))
+        )
+
+    def save(self, player: Player) -> bool:
+        if player is None:
+            return False
+        with self._connection() as conn:
+            cur = conn.execute("INSERT OR IGNORE INTO players VALUES (?, ?, ?, ?, ?)", self._player_record(player))
+            if cur.rowcount == 0:
+                return False
+            conn.executemany("INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?, ?)", self._season_records(player))
+        return True
+
+    def delete(self, id):
+        with self._connection() as conn:
+            cur = conn.execute("DELETE FROM players WHERE id = ?", (str(id),))
+        if cur.rowcount:
+            record_change(id, DELETE)
+
+    def replace(self, id, player: Player):
+        with self._connection() as conn:
+            cur = conn.execute("DELETE FROM players WHERE id = ?", (str(id),))
+            existed = cur.rowcount > 0
+            conn.execute("INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?)", self._player_record(player))
+            conn.executemany("INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?, ?)", self._season_records(player))
+        record_change(id, UPDATE if existed else INSERT, player.serialize)
+
+    def _write_chunk(self, conn: sqlite3.Connection, rows: List[Dict]):
+        players = []
+        seasons = []
+        for row in rows:
+            player_id = str(row["player_id"])
+            players.append((player_id, row.get("player_name"), row.get("password"), row.get("age"), row.get("position")))
+            stats = {k: v for k, v in row.items() if k not in self._player_keys and k not in self._season_keys}
+            seasons.append((player_id, int(row["season_year"]), row.get("team_id"), row.get("team_name"), json.dumps(stats)))
+        recorded = recording()
+        with conn:
+            if recorded:
+                conn.execute("BEGIN IMMEDIATE")
+                existing = self._existing_ids(conn, "players", [player[0] for player in players])
+            conn.executemany("INSERT OR IGNORE INTO players VALUES (?, ?, ?, ?, ?)", players)
+            conn.executemany("INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?, ?)", seasons)
+        if recorded:
+            # Un evento por jugador, con las temporadas escritas en el bloque
+            written = {}
+            for player, season in zip(players, seasons):
+                written.setdefault(player[0], (player, []))[1].append(season)
+            for player_id, (player, player_seasons) in written.items():
+                row = functools.partial(self._written_player, player, player_seasons)
+                record_change(player_id, UPDATE if player_id in existing else INSERT, row)
+
+    def _written_player(self, player_record, season_records) -> Dict:
+        return self._to_players([player_record], season_records)[0].serialize()
+
+    def bulk_write_rows(self, row_iterable: Iterable[Dict], chunk_size: int = 10000) -> Dict:
+        start_time = time.time()
+        start_size = self._db_size()
+        count = 0
+        conn = self._connection()
+        buf = []
+        for row in row_iterable:
+            buf.append(row)
+            if len(buf) >= chunk_size:
+                self._write_chunk(conn, buf)
+                count += len(buf)
+                buf = []
+        if buf:
+            self._write_chunk(conn, buf)
+            count += len(buf)
+        return bulk_write_report(count, self._db_size() - start_size, start_time)
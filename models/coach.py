@@ -1,5 +1,6 @@
 from .user import User
-from database import RepositoryProvider
+from .codec import REFERENCE
+from database import resolve_reference
 
 class Coach(User):
     """
@@ -11,6 +12,12 @@ class Coach(User):
     Attributes:
     _team (str): ID del equipo al que pertenece (puede ser None al inicio)
     """
+    __slots__ = ("_team",)
+    # Agrega atributos específicos a la lista de serialización
+    _serializable_attr = User._serializable_attr + ("_team",)
+    # El equipo se guarda como ID
+    _field_codecs = {"_team": REFERENCE}
+
     def __init__(self, id, name, age, password=None, team=None):
         """
         Constructor de ClubMember.
@@ -24,8 +31,6 @@ class Coach(User):
         """
         super().__init__(id, name, age, password)
         self._team = team
-        # Agrega atributos específicos a la lista de serialización
-        self._serializable_attr += ["_team"]
 
     def get_team(self):
         """
@@ -33,14 +38,14 @@ class Coach(User):
         
         Si _team es solo un ID (string), lo convierte en objeto Team
         consultando el repositorio. Esto implementa lazy loading para
-        optimizar el uso de memoria.
+        optimizar el uso de memoria; dentro de una identity_session el
+        equipo se comparte con el resto de referencias a él.
         
         Returns:
         Team: Objeto del equipo al que pertenece
         """
         if isinstance(self._team, str):
-            teams_repo = RepositoryProvider.get("Team")
-            self._team = teams_repo.find(self._team)
+            self._team = resolve_reference("Team", self._team)
         return self._team
     
     def set_team(self, team):
@@ -50,19 +55,4 @@ class Coach(User):
         Args:
         team (str|Team): ID del equipo u objeto Team
         """
-        self._team = team 
-    
-    def serialize(self):
-        """
-        Serializa el miembro de club a diccionario.
-        
-        Convierte el objeto Team a ID para
-        permitir almacenamiento en JSON.
-        
-        Returns:
-        dict: Diccionario serializable del jugador
-        """
-        data = super().serialize()
-        # Convierte objeto Team a ID
-        data["_team"] = self._team.get_id() if not isinstance(self._team, str) else self._team
-        return data
\ No newline at end of file
+        self._team = team
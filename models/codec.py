@@ -0,0 +1,159 @@
+from enum import Enum
+from typing import Dict, Iterable, List
+import marshal
+
+# Marca de _field_codecs: el campo guarda una entidad o su ID y se serializa como ID
+REFERENCE = "reference"
+
+_codecs: Dict[type, "Codec"] = {}
+
+def codec_for(cls) -> "Codec":
+    """Retorna el códec de la clase, generándolo la primera vez."""
+    codec = _codecs.get(cls)
+    if codec is None:
+        codec = _codecs[cls] = Codec(cls)
+    return codec
+
+def _reference_id(value):
+    return value if value is None or isinstance(value, str) else value.get_id()
+
+def _transforms(spec, form: str):
+    # (codificar, decodificar) de un campo; None significa dejarlo igual
+    if spec is None:
+        return None, None
+    if spec is REFERENCE:
+        return _reference_id, None
+    if isinstance(spec, type) and issubclass(spec, Enum):
+        return (lambda value: None if value is None else value.value,
+                lambda value: None if value is None else spec(value))
+    if isinstance(spec, list):
+        encode, decode = _transforms(spec[0], form)
+        return (lambda items: [encode(item) for item in items] if encode else list(items),
+                lambda items: [decode(item) for item in items] if decode else list(items))
+    if isinstance(spec, tuple):
+        return spec
+    # Entidad anidada: se codifica con su propio códec
+    if form == "dict":
+        return (lambda value: codec_for(spec).to_dict(value),
+                lambda value: codec_for(spec).from_dict(value))
+    return (lambda value: codec_for(spec).to_tuple(value),
+            lambda value: codec_for(spec).from_tuple(value))
+
+def _compile_encoder(attrs, specs: Dict, form: str):
+    namespace = {}
+    entries = []
+    for i, attr in enumerate(attrs):
+        encode, _ = _transforms(specs.get(attr), form)
+        value = f"obj.{attr}"
+        if encode is not None:
+            namespace[f"encode_{i}"] = encode
+            value = f"encode_{i}({value})"
+        entries.append(f"{attr!r}: {value}" if form == "dict" else value)
+    body = f"{{{', '.join(entries)}}}" if form == "dict" else f"({', '.join(entries)},)"
+    return eval(f"lambda obj: {body}", namespace)
+
+def _compile_tuple_decoder(cls, attrs, specs: Dict):
+    # Escribe los slots directamente: no pasa por el constructor
+    namespace = {"new": cls.__new__, "cls": cls}
+    lines = ["def from_tuple(values):", "    obj = new(cls)"]
+    for i, attr in enumerate(attrs):
+        _, decode = _transforms(specs.get(attr), "tuple")
+        value = f"values[{i}]"
+        if decode is not None:
+            namespace[f"decode_{i}"] = decode
+            value = f"decode_{i}({value})"
+        lines.append(f"    obj.{attr} = {value}")
+    lines.append("    return obj")
+    exec("\n".join(lines), namespace)
+    return namespace["from_tuple"]
+
+def _slots(cls) -> set:
+    return {slot for klass in cls.__mro__ for slot in getattr(klass, "__slots__", ())}
+
+def _settable(cls, attr: str) -> bool:
+    # Un slot, o una propiedad con setter que completa los slots que arma
+    prop = getattr(cls, attr, None)
+    return attr in _slots(cls) or (isinstance(prop, property) and prop.fset is not None)
+
+def _compile_dict_decoder(cls, attrs, specs: Dict, fallback):
+    # Con exactamente las claves de serialize() escribe los atributos sin
+    # pasar por el constructor, como from_tuple. Cualquier otra forma (claves
+    # de más o de menos, listas en None) pasa por `fallback`, que usa el
+    # constructor y sus valores por defecto
+    namespace = {"new": cls.__new__, "cls": cls, "keys": set(attrs), "fallback": fallback}
+    lines = ["def from_dict(data):", "    if data.keys() != keys:", "        return fallback(data)", "    obj = new(cls)"]
+    for i, attr in enumerate(attrs):
+        spec = specs.get(attr)
+        _, decode = _transforms(spec, "dict")
+        lines.append(f"    value = data[{attr!r}]")
+        if decode is not None:
+            namespace[f"decode_{i}"] = decode
+            if isinstance(spec, list):
+                lines += ["    if value is None:", "        return fallback(data)", f"    value = decode_{i}(value)"]
+            else:
+                lines.append(f"    if value is not None:\n        value = decode_{i}(value)")
+        lines.append(f"    obj.{attr} = value")
+    lines.append("    return obj")
+    exec("\n".join(lines), namespace)
+    return namespace["from_dict"]
+
+class Codec:
+    """
+    Serialización precompilada de una clase Serializable.
+
+    Se genera una sola vez a partir de `_serializable_attr` (el formato de
+    diccionario de serialize) y de `_codec_attr` (los atributos que se
+    guardan en el formato de tupla, por defecto los mismos). Cada clase
+    indica en `_field_codecs` cómo convertir los campos que no son valores
+    simples: REFERENCE para entidades guardadas como ID, una Enum, otra
+    clase Serializable, una lista de alguno de ellos, o un par
+    (codificar, decodificar).
+
+    from_dict, con las claves exactas de serialize(), escribe los slots sin
+    pasar por el constructor, igual que from_tuple; con otras claves usa el
+    constructor (from_storage) y sus valores por defecto.
+
+    El formato binario es la tupla pasada por marshal: es compacto y
+    rápido, pero depende de la versión de Python, así que sirve para cachés
+    e intercambio entre procesos, no para los archivos de datos.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        specs = getattr(cls, "_field_codecs", {})
+        attrs = cls._serializable_attr
+        tuple_attrs = getattr(cls, "_codec_attr", None) or attrs
+        self.to_dict = _compile_encoder(attrs, specs, "dict")
+        self.to_tuple = _compile_encoder(tuple_attrs, specs, "tuple")
+        self.from_tuple = _compile_tuple_decoder(cls, tuple_attrs, specs)
+        # Clave guardada -> (parámetro del constructor, decodificador)
+        self._params = {attr: (attr.lstrip("_"), _transforms(specs.get(attr), "dict")[1]) for attr in attrs}
+        # El diccionario completo se decodifica como la tupla, escribiendo los
+        # slots. Las claves que no son slots tienen que ser propiedades con
+        # setter que completen los slots restantes (ver Season._stats)
+        slots = _slots(cls)
+        direct = all(_settable(cls, attr) for attr in attrs) and (slots <= set(attrs) or not set(attrs) <= slots)
+        self.from_dict = _compile_dict_decoder(cls, attrs, specs, self._from_fields) if direct else self._from_fields
+
+    def _from_fields(self, data: Dict):
+        # Reconstruye la entidad con su constructor, sin efectos de
+        # persistencia (ver from_storage)
+        fields = {}
+        params = self._params
+        for key, value in data.items():
+            param, decode = params.get(key) or (key.lstrip("_"), None)
+            fields[param] = value if decode is None or value is None else decode(value)
+        return self.cls.from_storage(**fields)
+
+    def dumps(self, obj) -> bytes:
+        return marshal.dumps(self.to_tuple(obj))
+
+    def loads(self, data: bytes):
+        return self.from_tuple(marshal.loads(data))
+
+    def dumps_many(self, objs: Iterable) -> bytes:
+        to_tuple = self.to_tuple
+        return marshal.dumps([to_tuple(obj) for obj in objs])
+
+    def loads_many(self, data: bytes) -> List:
+        from_tuple = self.from_tuple
+        return [from_tuple(values) for values in marshal.loads(data)]
@@ -1,7 +1,11 @@
 from .serializable import Serializable
+from .codec import REFERENCE
 from .user import User
-from database import RepositoryProvider
+from database import RepositoryProvider, resolve_reference, resolve_references
+from array import array
 from enum import Enum
+from numbers import Real
+import struct
 
 class Position(Enum):
     """
@@ -21,50 +25,170 @@ class Position(Enum):
     DC = "DC"   # Delantero Centro
     RW = "RW"   # Extremo Derecho (Right Wing)
 
+# Estadísticas de temporada en el orden en que se guardan; cada temporada
+# las mantiene en un array('d') de este largo en lugar de un dict
+STAT_FIELDS = (
+    "games",
+    "minutes",
+    "goals",
+    "assists",
+    "pre_assists",
+    "clearances",
+    "chances_created",
+    "shots",
+    "shots_on_target",
+    "pass_accuracy",
+    "yellow_cards",
+    "red_cards",
+    "injured",
+    "score",
+)
+# Las que no figuran aquí se leen como float
+_INT_STATS = frozenset(STAT_FIELDS) - {"pass_accuracy", "score"}
+_IS_INT_STAT = tuple(name in _INT_STATS for name in STAT_FIELDS)
+_STAT_INDEX = {name: i for i, name in enumerate(STAT_FIELDS)}
+# NaN marca una estadística ausente
+_MISSING = float("nan")
+_EMPTY_STATS = array("d", [_MISSING]) * len(STAT_FIELDS)
+_ZERO_STATS = array("d", [0.0]) * len(STAT_FIELDS)
+
+def _stat_value(name: str, value: float):
+    if value != value:
+        return None
+    if name in _INT_STATS and value.is_integer():
+        return int(value)
+    return value
+
+def _compile_stats_codec():
+    # (leer, escribir) las estadísticas de STAT_FIELDS como dict sin un
+    # bucle por estadística. Leer retorna None si falta alguna (NaN) y
+    # escribir si el dict no trae exactamente esas claves con int o float;
+    # esos casos los resuelve el camino general
+    names = [f"v{i}" for i in range(len(STAT_FIELDS))]
+    entries = [
+        f"{name!r}: int({v}) if {v}.is_integer() else {v}" if is_int else f"{name!r}: {v}"
+        for name, is_int, v in zip(STAT_FIELDS, _IS_INT_STAT, names)
+    ]
+    keys = ", ".join(f"stats[{name!r}]" for name in STAT_FIELDS)
+    source = "\n".join([
+        "def read(values):",
+        f"    {', '.join(names)}, = values",
+        f"    total = {' + '.join(names)}",
+        "    if total - total != 0:",
+        "        return None",
+        f"    return {{{', '.join(entries)}}}",
+        "def write(stats):",
+        "    if len(stats) != size or not numbers.issuperset(map(type, stats.values())):",
+        "        return None",
+        "    values = array('d')",
+        "    try:",
+        f"        values.frombytes(pack({keys}))",
+        "    except KeyError:",
+        "        return None",
+        "    return values",
+    ])
+    namespace = {"array": array, "pack": struct.Struct(f"{len(STAT_FIELDS)}d").pack,
+                 "size": len(STAT_FIELDS), "numbers": {int, float}}
+    exec(source, namespace)
+    return namespace["read"], namespace["write"]
+
+_read_stats, _write_stats = _compile_stats_codec()
+
+def _pack_stats(values: array) -> bytes:
+    return values.tobytes()
+
+def _unpack_stats(data: bytes) -> array:
+    values = array("d")
+    values.frombytes(data)
+    return values
+
 class Season(Serializable):
+    """
+    Temporada de un jugador: año, equipo y estadísticas.
+
+    Las estadísticas de STAT_FIELDS se guardan en un array('d') de tamaño
+    fijo; las que no son numéricas o no figuran en STAT_FIELDS quedan en un
+    dict aparte que solo se crea si hace falta. `_stats` sigue devolviendo
+    el dict completo para serializar.
+    """
+    __slots__ = ("_id", "_team", "_year", "_values", "_extra")
+    _serializable_attr = ("_id", "_team", "_year", "_stats")
+    # El formato de tupla del códec guarda el array tal cual, como bytes
+    _codec_attr = ("_id", "_team", "_year", "_values", "_extra")
+    _field_codecs = {"_team": REFERENCE, "_values": (_pack_stats, _unpack_stats)}
+
     def __init__(
         self,
         id,
         year: int,
-        team=None,  
-        stats={"games": 0,
-        "minutes": 0,
-        "goals": 0, 
-        "assists": 0,
-        "pre_assists": 0,
-        "clearances": 0,
-        "chances_created": 0, 
-        "shots": 0,   
-        "shots_on_target": 0,
-        "pass_accuracy": 0,
-        "yellow_cards": 0,
-        "red_cards": 0,
-        "injured": 0,
-        "score": 0.0}
+        team=None,
+        stats: dict = None
     ):
         self._id = id
         self._team = team
         self._year = year
         self._stats = stats
-        self._serializable_attr = ["_id", "_team", "_year", "_stats"]
 
+    @property
+    def _stats(self) -> dict:
+        stats = _read_stats(self._values)
+        if stats is None:
+            stats = {
+                name: int(value) if is_int and value.is_integer() else value
+                for name, is_int, value in zip(STAT_FIELDS, _IS_INT_STAT, self._values)
+                if value == value
+            }
+        if self._extra:
+            stats.update(self._extra)
+        return stats
+
+    @_stats.setter
+    def _stats(self, stats: dict):
+        # Reemplaza todas las estadísticas; la usan el constructor y el
+        # códec al decodificar serialize(). Sin estadísticas todas empiezan
+        # en cero
+        self._extra = None
+        if stats is None:
+            self._values = array("d", _ZERO_STATS)
+            return
+        values = _write_stats(stats)
+        if values is not None:
+            self._values = values
+            return
+        values = self._values = array("d", _EMPTY_STATS)
+        for name, value in stats.items():
+            index = _STAT_INDEX.get(name)
+            if index is not None and type(value) in (int, float):
+                values[index] = value
+            else:
+                self.set_state(name, value)
 
     def get_id(self):
         return self._id
 
     def get_team(self):
         if isinstance(self._team, str):
-            teams_repo = RepositoryProvider.get("Team")
-            self._team = teams_repo.find(self._team)
+            self._team = resolve_reference("Team", self._team)
         return self._team
     
     def get_stat(self, stat_name: str):
-        if not stat_name in self._stats:
-            return None
-        return self._stats[stat_name]
+        index = _STAT_INDEX.get(stat_name)
+        if index is None:
+            return self._extra.get(stat_name) if self._extra else None
+        return _stat_value(stat_name, self._values[index])
 
     def set_state(self, stat_name: str, value):
-        self._stats[stat_name] = value
+        index = _STAT_INDEX.get(stat_name)
+        if index is not None and isinstance(value, Real) and not isinstance(value, bool):
+            self._values[index] = value
+            if self._extra:
+                self._extra.pop(stat_name, None)
+            return
+        if index is not None:
+            self._values[index] = _MISSING
+        if self._extra is None:
+            self._extra = {}
+        self._extra[stat_name] = value
 
     def get_year(self):
         return self._year
@@ -72,33 +196,29 @@ class Season(Serializable):
     def set_year(self, year):
         self._year = year
 
-    def serialize(self):
-        data = super().serialize()
-        
-        data["_team"] = self._team.get_id() if not isinstance(self._team, str) else self._team
-        return data
-
-    @classmethod
-    def deserialize(cls, data):
-        print(data)
-        return super().deserialize(data)
 
 
 class Player(User):
+    __slots__ = ("_position", "_seasons")
+    # Registra atributos específicos para serialización
+    _serializable_attr = User._serializable_attr + ("_position", "_seasons")
+    # La posición se guarda como string y las temporadas con su propio códec
+    _field_codecs = {"_position": Position, "_seasons": [Season]}
+
     def __init__(self, 
                  id,
                  name,
                  age,
                  password=None, 
                  position: Position=None, 
-                 seasons=[]):
+                 seasons=None):
         super().__init__(id, name, age, password)
         # Maneja conversión automática de string a enum Position
         self._position = position if isinstance(position, Position) else (Position(position) if position else None)
-        self._seasons: list[Season] = seasons
-        # Registra atributos específicos para serialización
-        self._serializable_attr += ["_position", "_seasons"]
-        RepositoryProvider.get("Player").save(self)
+        self._seasons: list[Season] = seasons if seasons is not None else []
+        # Al reconstruir desde almacenamiento no se vuelve a guardar
+        if not Serializable.is_hydrating():
+            RepositoryProvider.get("Player").save(self)
     
     
     def get_position(self) -> Position | str:
@@ -126,6 +246,20 @@ class Player(User):
     def get_seasons(self) -> list[Season]:
         return self._seasons
 
+    def get_teams(self) -> list:
+        """
+        Resuelve los equipos de todas las temporadas en un solo lote.
+
+        Returns:
+        list: El equipo de cada temporada, en el mismo orden
+        """
+        pending = [season for season in self._seasons if isinstance(season._team, str)]
+        if pending:
+            teams = resolve_references("Team", [season._team for season in pending])
+            for season, team in zip(pending, teams):
+                season._team = team
+        return [season._team for season in self._seasons]
+
     def add_season(self, season: Season):
         self.get_seasons().append(season)
 
@@ -139,39 +273,3 @@ class Player(User):
         if num <= 0 or len(self.get_seasons()) < num:
             return None
         return self.get_seasons()[num - 1]
-
-    def serialize(self):
-        """
-        Serializa el jugador a diccionario.
-        
-        Convierte el enum Position a string y el objeto Team a ID para
-        permitir almacenamiento en JSON.
-        
-        Returns:
-        dict: Diccionario serializable del jugador
-        """
-        data = super().serialize()
-        # Convierte enum a valor string
-        data["_seasons"] = [s.serialize() for s in self.get_seasons()]
-        data["_position"] = self.get_position().value if self.get_position() else None
-        return data
-
-    @classmethod
-    def deserialize(cls, data: dict):
-        """
-        Crea un objeto Player desde un diccionario.
-        
-        Convierte el string de posición de vuelta a enum Position.
-        
-        Args:
-        data (dict): Datos serializados del jugador
-            
-        Returns:
-        Player: Instancia de jugador con datos cargados
-        """
-        # Convierte string a enum antes de crear el objeto
-        if "_position" in data and data["_position"]:
-            data["_position"] = Position(data["_position"])
-        if "_seasons" in data and data["_seasons"]:
-            data["_seasons"] = [Season.deserialize(s) for s in data["_seasons"]]
-        return super().deserialize(data)
@@ -10,6 +10,9 @@ class Referee(User):
     Attributes:
     _license (str): Número de licencia único que identifica al árbitro
     """
+    __slots__ = ("_license",)
+    _serializable_attr = User._serializable_attr + ("_license",)
+
     def __init__(self, id, name, age, password=None, license=None):
         """
         Constructor de Referee.
@@ -23,7 +26,6 @@ class Referee(User):
         """
         super().__init__(id, name, age, password)
         self._license = license
-        self._serializable_attr += ["_license"]
 
     def get_license(self):
         """Retorna el número de licencia del árbitro."""
@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+from .codec import codec_for
+import threading
+
+# Marca por hilo de que se está reconstruyendo un objeto desde almacenamiento
+_hydration = threading.local()
 
 class Serializable(ABC):
     """
@@ -7,7 +12,11 @@ class Serializable(ABC):
     Ofrece métodos de serialización y deserialización para convertir objetos en diccionarios 
     y reconstruirlos después, lo que permite manejar de forma sencilla el guardado y la carga 
     de datos.
+
+    Las entidades declaran __slots__ y una lista _serializable_attr a nivel
+    de clase, así cada instancia solo ocupa el espacio de sus atributos.
     """
+    __slots__ = ()
 
     @abstractmethod
     def get_id(self):
@@ -21,20 +30,21 @@ class Serializable(ABC):
         """
         Convierte el objeto en un diccionario listo para guardar.
 
-        Se basa en el atributo _serializable_attr, que cada clase define para indicar qué campos deben incluirse.
+        Se basa en el atributo de clase _serializable_attr, que indica qué campos deben incluirse,
+        y en _field_codecs para convertir entidades y enums a valores simples.
 
         Returns:
         dict: Diccionario con los atributos seleccionados del objeto.
         """
-        return {attr: getattr(self, attr) for attr in self._serializable_attr}
+        return codec_for(type(self)).to_dict(self)
     
     @classmethod
     def deserialize(cls, data: dict):
         """
         Crea una instancia de la clase a partir de un diccionario.
         
-        Remueve los guiones bajos de las claves para hacerlas compatibles
-        con los parámetros del constructor.
+        Las claves se traducen a los parámetros del constructor (sin el
+        guion bajo inicial) con el mapeo que el códec precalcula.
         
         Args:
         data (dict): Diccionario con los datos del objeto
@@ -42,11 +52,41 @@ class Serializable(ABC):
         Returns:
         Instancia de la clase con los datos cargados
         """
-        # Remueve el underscore inicial de las claves para que coincidan
-        # con los nombres de parámetros del constructor
-        clean_data = {k.lstrip("_"): v for k, v in data.items()}
-        obj = cls(**clean_data)
-        # Preserva la lista de atributos serializables si no existe
-        if not hasattr(obj, "_serializable_attr"):
-            obj._serializable_attr = list(data.keys())
-        return obj
\ No newline at end of file
+        return codec_for(cls).from_dict(data)
+
+    @classmethod
+    def codec(cls):
+        """
+        Retorna el códec compilado de la clase (ver models.codec.Codec),
+        con los formatos de tupla y binario además del diccionario.
+        """
+        return codec_for(cls)
+
+    @classmethod
+    def from_storage(cls, **fields):
+        """
+        Crea una instancia a partir de datos ya almacenados.
+
+        A diferencia de llamar al constructor directamente, no dispara los
+        guardados automáticos que hacen algunas entidades al crearse (por
+        ejemplo Player o Team), ni para el objeto ni para los que se creen
+        dentro de él. Los repositorios la usan al cargar datos; para
+        persistir hay que llamar explícitamente a save.
+
+        Args:
+        **fields: Argumentos del constructor
+
+        Returns:
+        Instancia de la clase con los datos cargados
+        """
+        previous = getattr(_hydration, "active", False)
+        _hydration.active = True
+        try:
+            return cls(**fields)
+        finally:
+            _hydration.active = previous
+
+    @staticmethod
+    def is_hydrating():
+        """Indica si el hilo actual está reconstruyendo objetos con from_storage."""
+        return getattr(_hydration, "active", False)
@@ -1,5 +1,6 @@
 from .serializable import Serializable
-from database import RepositoryProvider
+from .codec import REFERENCE
+from database import RepositoryProvider, resolve_reference, resolve_references
 
 class Team(Serializable):
     """
@@ -16,6 +17,11 @@ class Team(Serializable):
     players (list): Lista de IDs de jugadores
     staff (list): Lista de IDs del personal técnico
     """
+    __slots__ = ("_id", "_name", "coach", "players")
+    _serializable_attr = ("_id", "_name", "coach", "players")
+    # Coach y jugadores se guardan como IDs para evitar serialización recursiva
+    _field_codecs = {"coach": REFERENCE, "players": [REFERENCE]}
+
     def __init__(self, id, name, players=[], coach=None):
         """
         Constructor de Team.
@@ -31,10 +37,12 @@ class Team(Serializable):
         self._name = name
         self.coach = coach
         self.players = players or []
-        self._serializable_attr = ["_id", "_name", "coach", "players"]
-        self.get_coach().set_team(self)
-        RepositoryProvider.get("Coach").save(self.coach)
-        RepositoryProvider.get("Team").save(self)
+        # Al reconstruir desde almacenamiento el coach queda como ID y no se
+        # vuelve a guardar nada
+        if not Serializable.is_hydrating():
+            self.get_coach().set_team(self)
+            RepositoryProvider.get("Coach").save(self.coach)
+            RepositoryProvider.get("Team").save(self)
 
     def get_id(self):
         """Retorna el ID del equipo."""
@@ -56,7 +64,7 @@ class Team(Serializable):
     def get_coach(self):
         """Retorna el ID o objeto del entrenador del equipo."""
         if isinstance(self.coach, str):
-            self.coach = RepositoryProvider.get('Coach').find(self.coach)
+            self.coach = resolve_reference("Coach", self.coach)
         return self.coach
 
     def set_coach(self, coach_id):
@@ -73,14 +81,15 @@ class Team(Serializable):
         Retorna la lista de jugadores del equipo.
         
         Si los jugadores están almacenados como IDs, los convierte en
-        objetos Player consultando el repositorio (lazy loading).
+        objetos Player consultando el repositorio en un solo lote
+        (lazy loading). Dentro de una identity_session solo se cargan los
+        que no se habían cargado antes.
         
         Returns:
         list: Lista de objetos Player
         """
         if len(self.players) > 0 and isinstance(self.players[0], str):
-            players_repo = RepositoryProvider.get("Player")
-            self.players = [players_repo.find(player) for player in self.players]
+            self.players = resolve_references("Player", self.players)
         return self.players
 
     def add_player(self, player):
@@ -105,19 +114,3 @@ class Team(Serializable):
         """
         if player_id in self.players:
             self.players.remove(player_id)
-
-    def serialize(self):
-        """
-        Serializa el equipo a diccionario.
-        
-        Convierte objetos anidados (coach, players, staff) a sus IDs
-        para evitar serialización recursiva infinita.
-        
-        Returns:
-        dict: Diccionario serializable del equipo
-        """
-        data = super().serialize()
-        # Convierte objetos a IDs si es necesario
-        data["coach"] = self.coach.get_id() if not isinstance(self.coach, str) else self.coach
-        data["players"] = [p.get_id() if not isinstance(p, str) else p for p in self.players]
-        return data
\ No newline at end of file
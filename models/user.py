@@ -13,6 +13,10 @@ class User(Serializable):
     _age (int): Edad del usuario
     _password (str): Contraseña del usuario (debe ser encriptada antes de almacenar)
     """
+    __slots__ = ("_id", "_name", "_age", "_password")
+    # Define qué atributos se incluirán en la serialización
+    _serializable_attr = ("_id", "_name", "_age", "_password")
+
     def __init__(self, id, name, age, password=None):
         """
         Constructor de la clase User.
@@ -27,8 +31,6 @@ class User(Serializable):
         self._name = name
         self._age = age
         self._password = password
-        # Define qué atributos se incluirán en la serialización
-        self._serializable_attr = ["_id", "_name", "_age", "_password"]
 
     def get_id(self):
         """Retorna el ID único del usuario."""
@@ -1,19 +1,27 @@
 from database.csv_repository import CSVRepository
+from database.columnar_store import ColumnarSeasonStore
 from models import Position
 import random
 import numpy as np
-import time
 from datetime import datetime
 from faker import Faker
 from typing import Dict, Iterable
 
 class DataService:
+    TEAMS = ["Real Madrid", "Barcelona", "Bayern Múnich", "Dortmund", "Liverpool", "PSG", 
+             "Sporting Club", "Benfica", "Atletico de Madrid", "Manchester City", "Chelsea", 
+             "Milan", "Inter de Milán", "Arsenal", "Napoli"]
+
     def __init__(self, repository=None, seed=42):
         self.repo = repository if repository else CSVRepository(None)
         self.faker = Faker("es_CO")
         random.seed(seed)
         np.random.seed(seed)
         self.seed = seed
+        # Generador de generate_stats_batch cuando no se le pasa uno; cada
+        # bloque de generate_block usa el suyo, derivado de la semilla
+        self.rng = np.random.default_rng(seed)
+        self._names = None
         self.positions = [pos.value for pos in Position]
 
         self.position_profiles = {
@@ -104,10 +112,161 @@ class DataService:
             "score": round(score, 2)
         }
 
+    def _profile_arrays(self, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        # Una columna por parámetro de position_profiles, alineada con positions
+        names, codes = np.unique(positions, return_inverse=True)
+        profiles = [self.position_profiles.get(name, self.position_profiles["MC"]) for name in names]
+        return {key: np.array([profile[key] for profile in profiles])[codes] for key in profiles[0]} if profiles else {}
+
+    def _games_by_age_batch(self, ages: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+        rng = self.rng if rng is None else rng
+        avg = 50 * np.exp(-0.5 * ((ages - 27) / 6) ** 2)
+        return np.clip(rng.normal(avg, 8), 1, 50).astype(np.int64)
+
+    def generate_stats_batch(self, positions, ages, games, rng: np.random.Generator = None) -> Dict[str, np.ndarray]:
+        """
+        Versión vectorizada de _generate_stats_for_position para muchas temporadas.
+
+        Usa las mismas distribuciones y position_profiles, pero cada
+        estadística sale de una sola llamada al generador.
+
+        Args:
+        positions (array): Posición de cada temporada ("DC", "GK", ...)
+        ages (array): Edad del jugador en cada temporada
+        games (array): Partidos jugados en cada temporada
+        rng (Generator, optional): Generador a usar; por defecto self.rng
+
+        Returns:
+        dict: Columna -> arreglo de numpy, en el orden de las filas
+        """
+        rng = self.rng if rng is None else rng
+        positions = np.asarray(positions)
+        ages = np.asarray(ages, dtype=np.int64)
+        games = np.asarray(games, dtype=np.int64)
+        n = len(positions)
+        profile = self._profile_arrays(positions)
+
+        starter_minutes = rng.normal(82, 6, n)
+        minutes = np.rint(games * np.clip(starter_minutes * rng.uniform(0.6, 1.0, n), 45, 90)).astype(np.int64)
+        minutes = np.where(ages <= 18, (minutes * rng.uniform(0.4, 0.8, n)).astype(np.int64), minutes)
+        minutes[games == 0] = 0
+        played = minutes / 90.0
+
+        goals = rng.poisson(profile["goal_rate"] * played)
+        assists = rng.poisson(profile["assist_rate"] * played)
+        shots = rng.poisson(profile["shots90"] * played)
+        clearances = rng.poisson(profile["clear90"] * played)
+        chances_created = rng.poisson(profile["chances90"] * played)
+
+        on_target_rate = np.select(
+            [np.isin(positions, ("DC", "LW", "RW")), np.isin(positions, ("MCO", "MC")),
+             np.isin(positions, ("DFC", "LD", "LI", "MCD"))],
+            [0.45, 0.38, 0.28], default=0.1)
+        shots_on_target = rng.binomial(shots, on_target_rate)
+
+        pass_accuracy = np.round(np.clip(rng.normal(profile["pass_mean"], 4), 50, 95), 1)
+        pre_assists = rng.binomial(chances_created, 0.25)
+        yellow_cards = rng.poisson(0.01 * played * 10)
+        red_cards = rng.binomial(1, np.clip(0.002 * played + 0.001 * np.maximum(0, ages - 30), 0, 0.05))
+        injured = ((50 - games) * np.clip(0.1 * (ages - 18), 0, 0.5)).astype(np.int64)
+        score = np.round(rng.uniform(5, 10, n), 2)
+
+        return {
+            "games": games,
+            "minutes": minutes,
+            "goals": goals,
+            "assists": assists,
+            "pre_assists": pre_assists,
+            "clearances": clearances,
+            "chances_created": chances_created,
+            "shots": shots,
+            "shots_on_target": shots_on_target,
+            "pass_accuracy": pass_accuracy,
+            "yellow_cards": yellow_cards,
+            "red_cards": red_cards,
+            "injured": injured,
+            "score": score,
+        }
+
+    def generate_block(self, first_id: int, count: int, min_age: int = 15, max_age: int = 28):
+        """
+        Genera `count` jugadores (ids P<first_id> en adelante) como un bloque columnar.
+
+        Sigue las mismas reglas que _generate_seasons_for_player (años,
+        edades, cambios de equipo con probabilidad 0.5 por temporada) pero
+        todo con operaciones sobre arreglos. Los nombres salen de un conjunto
+        generado una vez con Faker a partir de la semilla.
+
+        El bloque usa su propio generador, sembrado con (semilla, first_id):
+        depende solo de esos dos valores, no de qué bloques se generaron
+        antes ni en qué orden, así que se pueden generar en paralelo.
+
+        Returns:
+        DataFrame: Filas jugador-temporada con las columnas de generate_data,
+            las temporadas de cada jugador contiguas
+        """
+        import pandas as pd
+
+        rng = np.random.default_rng([self.seed, first_id])
+        now_year = datetime.now().year
+        start_year = rng.integers(now_year - max_age + min_age, now_year - 1, size=count, endpoint=True)
+        num_seasons = now_year - start_year
+        base_age = rng.integers(min_age, max_age - num_seasons + 1, endpoint=True)
+        positions = rng.choice(self.positions, size=count)
+        initial_team = rng.integers(0, len(self.TEAMS), size=count)
+        initial_team_id = rng.integers(1, 100, size=count, endpoint=True)
+        names = rng.choice(self._name_pool(), size=count)
+        passwords = np.char.zfill(rng.integers(0, 10 ** 8, size=count).astype(str), 8)
+
+        # Una fila por temporada; k es el número de temporada dentro del jugador
+        player = np.repeat(np.arange(count), num_seasons)
+        first_row = np.repeat(np.cumsum(num_seasons) - num_seasons, num_seasons)
+        rows = len(player)
+        k = np.arange(rows) - first_row
+        ages = base_age[player] + k + 1
+
+        # El equipo de cada temporada es el del último cambio del jugador
+        changed = rng.random(rows) < 0.5
+        new_team = rng.integers(0, len(self.TEAMS), size=rows)
+        new_team_id = rng.integers(1, 100, size=rows, endpoint=True)
+        last_change = np.maximum.accumulate(np.where(changed, np.arange(rows), -1))
+        own_change = last_change >= first_row
+        team = np.where(own_change, new_team[last_change], initial_team[player])
+        team_id = np.where(own_change, new_team_id[last_change], initial_team_id[player])
+
+        games = self._games_by_age_batch(ages, rng)
+        block = {
+            "player_id": np.char.add("P", (np.arange(count) + first_id).astype(str))[player],
+            "player_name": names[player],
+            "age": ages,
+            "password": passwords[player],
+            "position": positions[player],
+            "team_id": np.char.add("T", team_id.astype(str)),
+            "team_name": np.array(self.TEAMS)[team],
+            "season_year": start_year[player] + k + 1,
+        }
+        block.update(self.generate_stats_batch(positions[player], ages, games, rng))
+        return pd.DataFrame(block)
+
+    def generate_blocks(self, count: int, block_size: int = 10000) -> Iterable:
+        """
+        Genera `count` jugadores en bloques de `block_size` (ver generate_block).
+
+        Con la misma semilla y el mismo block_size los bloques son idénticos,
+        sin importar el orden en que se consuman.
+        """
+        for first_id in range(0, count, block_size):
+            yield self.generate_block(first_id, min(block_size, count - first_id))
+
+    def _name_pool(self, size: int = 2000) -> np.ndarray:
+        if self._names is None:
+            faker = Faker("es_CO")
+            faker.seed_instance(self.seed)
+            self._names = np.array([faker.name_male() for _ in range(size)])
+        return self._names
+
     def _generate_seasons_for_player(self, player_id: str, min_age: int, max_age) -> Iterable[Dict]:
-        teams = ["Real Madrid", "Barcelona", "Bayern Múnich", "Dortmund", "Liverpool", "PSG", 
-                 "Sporting Club", "Benfica", "Atletico de Madrid", "Manchester City", "Chelsea", 
-                 "Milan", "Inter de Milán", "Arsenal", "Napoli"]
+        teams = self.TEAMS
         name = self.faker.name_male()
         
         position = random.choice(self.positions)
@@ -127,7 +286,7 @@ class DataService:
                 current_team = random.choice(teams)
                 team_id = f"T{random.randint(1, 100)}"
             
-            games = self._games_by(age)
+            games = self._by_age(age)
             stats = self._generate_stats_for_position(position, games, age)
 
             row = {
@@ -151,27 +310,36 @@ class DataService:
             for row in self._generate_seasons_for_player(player_id, 15, 28):
                 yield row
 
-    def generate_dataset(self, target_rows: int, chunk_size: int = 10000) -> Dict:
-        start_time = time.time()
-        
-        data_generator = self.generate_data(target_rows)
-        self.repo.bulk_write_rows(data_generator, chunk_size=chunk_size)
-        
-        duration = time.time() - start_time
+    def generate_dataset(self, target_rows: int, chunk_size: int = 10000, vectorized: bool = False) -> Dict:
+        if vectorized:
+            # Los bloques se escriben como DataFrames, sin pasar por un dict por fila
+            report = self.repo.bulk_write_frames(self.generate_blocks(target_rows, chunk_size), chunk_size=chunk_size)
+        else:
+            report = self.repo.bulk_write_rows(self.generate_data(target_rows), chunk_size=chunk_size)
         
         sample_row = next(self.generate_data(1))
 
         columns = list(sample_row.keys())
         
         return {
-            'rows_written': target_rows,
-            'duration_s': round(duration, 2),
+            'rows_written': report['rows_written'],
+            'bytes_written': report['bytes_written'],
+            'rows_per_s': report['rows_per_s'],
+            'duration_s': report['duration_s'],
             'columns': columns
         }
 
-    def load_file(self, path: str):
+    def load_file(self, path: str, columnar: bool = False):
         import pandas as pd
         
+        # Con columnar=True los CSV se sirven desde su almacén columnar
+        # mapeado en memoria (data/<nombre>.columns/), que se reconstruye solo
+        # cuando cambia el archivo de origen. Las columnas de texto vuelven
+        # como Categorical de solo lectura, así que es opcional
+        store = ColumnarSeasonStore.for_source(path) if columnar and path.endswith('.csv') else None
+        if store is not None and store.is_fresh(path):
+            return store.to_dataframe()
+
         if path.endswith('.csv'):
             df = pd.read_csv(path)
         elif path.endswith('.json'):
@@ -190,6 +358,10 @@ class DataService:
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
             elif col in ['pass_accuracy', 'score']:
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(float)
+
+        if store is not None:
+            store.write(df, source=path)
+            return store.to_dataframe()
         return df
 
     def clean_data(self, df):
@@ -2,6 +2,14 @@ from models import User, Player, Coach, Referee
 from .auth_service import AuthService
 from database import RepositoryProvider
 
+def _current_team_id(player):
+    # Equipo de la última temporada (el plantel actual), sin cargar el Team
+    seasons = player.get_seasons()
+    if not isinstance(seasons, list) or not seasons:
+        return None
+    team = max(seasons, key=lambda season: season.get_year())._team
+    return team if team is None or isinstance(team, str) else team.get_id()
+
 class PlayerManagementService:
     _instance = None
 
@@ -63,15 +71,26 @@ class PlayerManagementService:
         if isinstance(current_user, Coach):
             if not current_user.get_team():
                 return []
-            return [p.serialize() for p in players_repo.findAll() if 
-                    p.get_team().get_id() == current_user.get_team().get_id()]
+            return [p.serialize() for p in self._team_players(players_repo, current_user.get_team().get_id())]
         if isinstance(current_user, Referee):
             if team_id:
-                return [p.serialize() for p in players_repo.findAll() if p.get_team().get_id() == team_id]
-            return [p.serialize() for p in players_repo.findAll()]
+                return [p.serialize() for p in self._team_players(players_repo, team_id)]
+            # Con vistas columnares no se construyen Player ni Season
+            players = players_repo.views() if hasattr(players_repo, "views") else players_repo.findAll()
+            return [p.serialize() for p in players]
 
         raise ValueError("No tienes permisos")
 
+    def _team_players(self, players_repo, team_id):
+        # find_by_team trae a todos los que alguna vez jugaron en el equipo;
+        # solo quedan los que siguen en él. Un repositorio sin find_by_team
+        # (por ejemplo CSVRepository(Player)) se filtra completo
+        if hasattr(players_repo, "find_by_team"):
+            candidates = players_repo.find_by_team(team_id)
+        else:
+            candidates = players_repo.findAll()
+        return [player for player in candidates if _current_team_id(player) == team_id]
+
 
     def search_players(self, filters):
         players_repo = self.auth_service.players_repo
@@ -81,17 +100,9 @@ class PlayerManagementService:
             raise ValueError("No tienes permisos")
 
         if isinstance(current_user, (Coach, Referee)):
-            players = players_repo.findAll()
-            results = []
-            for p in players:
-                match = True
-                for key, value in filters.items():
-                    if getattr(p, key, None) != value:
-                        match = False
-                        break
-                if match:
-                    results.append(p.serialize())
-            return results
+            # Los filtros (columna__operador=valor) se evalúan sobre las filas
+            # del repositorio y solo se construyen los jugadores que coinciden
+            return [p.serialize() for p in players_repo.query(**filters)]
 
         raise ValueError("No tienes permisos")
 
@@ -66,10 +66,9 @@ def test_team():
 
 
 if __name__ == "__main__":
-    players_repo = CSVRepository(Player)
-    coachs_repo = CSVRepository(Coach)
-    teams_repo = CSVRepository(Team)
-    referee_repo = CSVRepository(Referee)
+    # Cada repositorio se construye la primera vez que se pide
+    for cls in (Player, Coach, Team, Referee):
+        RepositoryProvider.register_factory(cls.__name__, lambda cls=cls: CSVRepository(cls))
 
     test_season_and_player()
     test_repository()